@@ -0,0 +1,106 @@
+"""
+Chatbot/answer_cache.py
+Opt-in semantic answer cache for bot.generate_response (ANSWER_CACHE=1).
+
+Entries are bucketed by (project, voice_mode) and hold the query embedding,
+the ids of the chunks retrieved for it, a dialog key and the LLM answer. A
+lookup hits when a new query's embedding is within ANSWER_CACHE_THRESHOLD
+cosine similarity of a cached one *and* retrieval returned the same chunks
+*and* the dialog key matches, so the answer was built from the same context.
+The dialog key (bot._dialog_key) hashes the last AI reply before the query and
+is None on a first turn: opening questions are shared across sessions, while a
+follow-up like "what about the price?" only hits after the same AI reply. A bucket is dropped as soon as its project's index
+version (file signature from the registry, content stamp for Qdrant) changes,
+i.e. the index was rebuilt. A None version means the content can't be tracked
+right now: such turns are neither looked up nor stored.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+ENABLED = os.getenv("ANSWER_CACHE", "0") == "1"
+THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.95"))
+MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_SIZE", "256"))   # per bucket
+TTL = int(os.getenv("ANSWER_CACHE_TTL", str(6 * 3600)))
+
+_buckets = {}   # (project, voice_mode) -> {"version": ..., "entries": OrderedDict}
+_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "saved_seconds": 0.0}
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+def _unit(vec) -> np.ndarray:
+    v = np.asarray(vec, dtype=np.float32)
+    n = np.linalg.norm(v)
+    return v / n if n else v
+
+
+def _bucket(project: str, voice_mode: bool, version):
+    b = _buckets.get((project, voice_mode))
+    if b is None or b["version"] != version:
+        b = {"version": version, "entries": OrderedDict()}
+        _buckets[(project, voice_mode)] = b
+    return b["entries"]
+
+
+def lookup(project: str, voice_mode: bool, query_vec, chunk_ids, version, dialog=None):
+    """Cached answer text, or None."""
+    if version is None:
+        return None
+    q = _unit(query_vec)
+    chunk_ids = tuple(chunk_ids)
+    now = time.time()
+    with _lock:
+        entries = _bucket(project, voice_mode, version)
+        best, best_sim = None, THRESHOLD
+        for key, e in list(entries.items()):
+            if e["expires_at"] < now:
+                entries.pop(key)
+                continue
+            if e["chunk_ids"] != chunk_ids or e["dialog"] != dialog:
+                continue
+            sim = float(np.dot(q, e["vec"]))
+            if sim >= best_sim:
+                best, best_sim = key, sim
+
+        if best is None:
+            _stats["misses"] += 1
+            return None
+        entries.move_to_end(best)
+        e = entries[best]
+        _stats["hits"] += 1
+        _stats["saved_seconds"] += e["latency"]
+        return e["answer"]
+
+
+def store(project: str, voice_mode: bool, query_vec, chunk_ids, version,
+          answer: str, latency: float, dialog=None) -> None:
+    if version is None:
+        return
+    with _lock:
+        entries = _bucket(project, voice_mode, version)
+        key = object()
+        entries[key] = dict(
+            vec=_unit(query_vec),
+            chunk_ids=tuple(chunk_ids),
+            dialog=dialog,
+            answer=answer,
+            latency=latency,
+            expires_at=time.time() + TTL,
+        )
+        while len(entries) > MAX_ENTRIES:
+            entries.popitem(last=False)
+
+
+def stats() -> dict:
+    with _lock:
+        total = _stats["hits"] + _stats["misses"]
+        return dict(
+            _stats,
+            hit_ratio=_stats["hits"] / total if total else 0.0,
+            entries=sum(len(b["entries"]) for b in _buckets.values()),
+        )
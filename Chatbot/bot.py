@@ -1,11 +1,23 @@
 import os
 from dotenv import load_dotenv
 from collections import deque
-from langchain_openai import ChatOpenAI, OpenAIEmbeddings
-from langchain_core.messages import HumanMessage, AIMessage
-from langchain_community.vectorstores import FAISS
-import os
+from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
+import asyncio
+import functools
+import hashlib
 import re
+import threading
+import time
+
+try:
+    from Chatbot import answer_cache, catalog, registry, vectorstores
+    from Chatbot.embed_cache import CachedEmbeddings
+except ImportError:  # run from inside Chatbot/ (testing.py)
+    import answer_cache
+    import catalog
+    import registry
+    import vectorstores
+    from embed_cache import CachedEmbeddings
 
 #  If the query mentions one of these: {image_keywords}, end your answer with:
 #  IMAGE: <room name>
@@ -22,9 +34,43 @@ load_dotenv()
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 OPENAI_MODEL = "gpt-4.1"
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-# Shared LLM and Embeddings
-llm = ChatOpenAI(model=OPENAI_MODEL, temperature=0.2, openai_api_key=OPENAI_API_KEY)
-embedding = OpenAIEmbeddings(openai_api_key=OPENAI_API_KEY)
+# Shared LLM and Embeddings – built on first use, so importing the bot (app.py,
+# Celery, the voice process) doesn't load langchain_openai / openai up front
+_llm = None
+_embedding = None
+_clients_lock = threading.Lock()
+
+
+def get_llm():
+    global _llm
+    if _llm is None:
+        with _clients_lock:
+            if _llm is None:
+                from langchain_openai import ChatOpenAI
+                # stream_usage: streamed replies report token usage (incl. cached) too
+                _llm = ChatOpenAI(model=OPENAI_MODEL, temperature=0.2, openai_api_key=OPENAI_API_KEY,
+                                  stream_usage=True)
+    return _llm
+
+
+def get_embedding():
+    global _embedding
+    if _embedding is None:
+        with _clients_lock:
+            if _embedding is None:
+                from langchain_openai import OpenAIEmbeddings
+                # repeated queries skip the embeddings round-trip (see embed_cache.py)
+                _embedding = CachedEmbeddings(OpenAIEmbeddings(openai_api_key=OPENAI_API_KEY))
+    return _embedding
+
+
+def __getattr__(name):
+    # `from Chatbot.bot import llm` / `bot.embedding` still work
+    if name == "llm":
+        return get_llm()
+    if name == "embedding":
+        return get_embedding()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 # Prompt templates
@@ -177,162 +223,120 @@ ANSWER:
 """
 
 # Project configuration loader
+# Projects are described in Chatbot/projects.json (see catalog.py); their chunks
+# are searched through vectorstores.py – FAISS from the process-wide registry
+# (loaded lazily, evicted LRU-first) or a remote Qdrant collection.
+TEMPLATES = {
+    "KRUPAL_PROMPT": KRUPAL_PROMPT,
+    "RAMVAN_PROMPT": RAMVAN_PROMPT,
+    "FIREFLY_PROMPT": FIREFLY_PROMPT,
+    "LEGAL_PROMPT": LEGAL_PROMPT,
+    "REAL_ESTATE_PROMPT": REAL_ESTATE_PROMPT,
+}
 
 
 # ──────────────────────────────────────────────────────────────────────────────
 def _project_cfg(name: str):
-    print("Testing 3")
-    if name == "Krupal Habitat":
-        print("Testing 8")
-        print("🟡 Trying to load FAISS index")
-        try:
-            vec = FAISS.load_local(
-                os.path.join(BASE_DIR, "krupalfinal_faiss"),
-                embedding,
-                allow_dangerous_deserialization=True,
-            )
-            print("✅ FAISS loaded")
-        except Exception as e:
-            print(f"❌ Failed to load FAISS: {e}")
-            raise
-        return dict(
-            vector=FAISS.load_local(
-                os.path.join(BASE_DIR, "krupalfinal_faiss"),
-                embedding,
-                allow_dangerous_deserialization=True,
-            ),
-            images={
-                "amenities": "https://res.cloudinary.com/dqlrfkgt0/image/upload/v1752570131/amenities_yxwsos.png",
-                "clubhouse1": "https://res.cloudinary.com/dqlrfkgt0/image/upload/v1752570130/clubhouse1_ftj3be.png",
-                "clubhouse2": "https://res.cloudinary.com/dqlrfkgt0/image/upload/v1752570132/clubhouse2_c9rpm1.png",
-                "entrance gate": "https://res.cloudinary.com/dqlrfkgt0/image/upload/v1752570129/entrance_gate_fqvj9g.png",
-                "garden": "https://res.cloudinary.com/dqlrfkgt0/image/upload/v1752570128/garden_bbapb0.png",
-                "gym1": "https://res.cloudinary.com/dqlrfkgt0/image/upload/v1752570129/gym1_u80pin.png",
-                "gym2": "https://res.cloudinary.com/dqlrfkgt0/image/upload/v1752570127/gym2_zy4wkk.png",
-                "gym3": "https://res.cloudinary.com/dqlrfkgt0/image/upload/v1752570125/gym3_y0bgss.png",
-                "plot size": "",
-                "layout1": "https://res.cloudinary.com/dqlrfkgt0/image/upload/v1752570124/Layout_1_ls7niu.png",
-                "layout2": "https://res.cloudinary.com/dqlrfkgt0/image/upload/v1752570131/Layout_2_rw6gs2.png",
-                "location map": "https://res.cloudinary.com/dqlrfkgt0/image/upload/v1752570123/location_map_svrwg3.png",
-                "masterplan page": "https://res.cloudinary.com/dqlrfkgt0/image/upload/v1752570122/masterplan_page_xolaj0.png",
-                "site office": "https://res.cloudinary.com/dqlrfkgt0/image/upload/v1752570123/Site_office_wy2nqq.png",
-                "surrounding developments": "https://res.cloudinary.com/dqlrfkgt0/image/upload/v1752570123/surrounding_developments_h5rolw.png",
-                "theatre": "https://res.cloudinary.com/dqlrfkgt0/image/upload/v1752570130/theatre_u6nmdz.png",
-            },
-            tpl=KRUPAL_PROMPT,
-        )
-    print("Testing 4")
-    if name == "Ramvan Villas":
-        print("Testing 9")
-        return dict(
-            vector=FAISS.load_local(
-                os.path.join(BASE_DIR, "ramvan_faiss"),
-                embedding,
-                allow_dangerous_deserialization=True,
-            ),
-            images={
-                "amenities": "https://res.cloudinary.com/dqlrfkgt0/image/upload/v1752577372/amenities_bwjrvi.png",
-                "bathroom": "https://res.cloudinary.com/dqlrfkgt0/image/upload/v1752577372/Bathroom_akkylf.png",
-                "bedroom": "https://res.cloudinary.com/dqlrfkgt0/image/upload/v1752577371/Bedroom_vqcje1.png",
-                "kitchen": "https://res.cloudinary.com/dqlrfkgt0/image/upload/v1752577369/Kitchen_lsacjy.png",
-                "layout": "https://res.cloudinary.com/dqlrfkgt0/image/upload/v1752577374/layout_vqoqsm.png",
-                "living room": "https://res.cloudinary.com/dqlrfkgt0/image/upload/v1752577367/Living_room_edz5pe.png",
-                "nearby tourist attractions": "https://res.cloudinary.com/dqlrfkgt0/image/upload/v1752577365/nearby_tourist_attractions_gqhhyk.png",
-                "payment plan": "https://res.cloudinary.com/dqlrfkgt0/image/upload/v1752577366/payment_plan_ptx03d.png",
-                "progress1": "https://res.cloudinary.com/dqlrfkgt0/image/upload/v1752577364/progress1_xqo54b.png",
-                "progress2": "https://res.cloudinary.com/dqlrfkgt0/image/upload/v1752577370/progress2_hyt2hr.png",
-                "progress3": "https://res.cloudinary.com/dqlrfkgt0/image/upload/v1752577361/progress3_vsk3xz.jpg",
-                "ramvan map and nearby cities": "https://res.cloudinary.com/dqlrfkgt0/image/upload/v1752577361/ramvan_map_and_nearby_cities_hcz8hd.png",
-                "sample villa1": "https://res.cloudinary.com/dqlrfkgt0/image/upload/v1752577361/sample_villa1_t5r1xm.jpg",
-                "sample villa2": "https://res.cloudinary.com/dqlrfkgt0/image/upload/v1752577358/sample_villa2_dhex89.jpg",
-                "sample villa3": "https://res.cloudinary.com/dqlrfkgt0/image/upload/v1752577358/sample_villa3_c9y6po.jpg",
-                "sample villa4": "https://res.cloudinary.com/dqlrfkgt0/image/upload/v1752577357/sample_villa4_k80fvq.jpg",
-                "sample villa5": "https://res.cloudinary.com/dqlrfkgt0/image/upload/v1752577356/sample_villa5_u49opi.jpg",
-                "sample villa6": "https://res.cloudinary.com/dqlrfkgt0/image/upload/v1752577930/sample_villa6_rd8upo.jpg",
-                "sample villa7": "https://res.cloudinary.com/dqlrfkgt0/image/upload/v1752577927/sample_villa7_ux1u1m.jpg",
-                "sample villa8": "https://res.cloudinary.com/dqlrfkgt0/image/upload/v1752577926/sample_villa8_lgvxwv.jpg",
-                "sample villa9": "https://res.cloudinary.com/dqlrfkgt0/image/upload/v1752577356/sample_villa9_qefin3.jpg",
-                "sample villa10": "https://res.cloudinary.com/dqlrfkgt0/image/upload/v1752577355/sample_villa10_u70edd.jpg",
-            },
-            tpl=RAMVAN_PROMPT,
-        )
-    print("Testing 4")
-    if name == "Firefly Homes":
-        return dict(
-            vector=FAISS.load_local(
-                os.path.join(BASE_DIR, "firefly_faiss"),
-                embedding,
-                allow_dangerous_deserialization=True,
-            ),
-            images={
-                "clubhouse": "https://res.cloudinary.com/dqlrfkgt0/image/upload/v1749902620/clubhouse_og4dc2.jpg"
-            },
-            tpl=FIREFLY_PROMPT,
-        )
-    if name == "Sobha Central":
-        return dict(
-            vector=FAISS.load_local(
-                os.path.join(BASE_DIR, "sobha_faiss"),
-                embedding,
-                allow_dangerous_deserialization=True,
-            ),
-            tpl=REAL_ESTATE_PROMPT,
-        )
-    if name == "Samana Portofonio":
-        return dict(
-            vector=FAISS.load_local(
-                os.path.join(BASE_DIR, "samana_faiss"),
-                embedding,
-                allow_dangerous_deserialization=True,
-            ),
-            tpl=REAL_ESTATE_PROMPT,
-        )
-    if name == "Marriot Residencies Jumeirah Lake Towers":
-        return dict(
-            vector=FAISS.load_local(
-                os.path.join(BASE_DIR, "marriot_jlt_faiss"),
-                embedding,
-                allow_dangerous_deserialization=True,
-            ),
-            tpl=REAL_ESTATE_PROMPT,
-        )
-    if name == "Damac Riverside":
-        return dict(
-            vector=FAISS.load_local(
-                os.path.join(BASE_DIR, "riverside_faiss"),
-                embedding,
-                allow_dangerous_deserialization=True,
-            ),
-            tpl=REAL_ESTATE_PROMPT,
-        )
+    spec = catalog.project(name)
+    store = vectorstores.for_spec(spec, get_embedding())
+    return dict(
+        store=store,
+        filter=spec.get("filter"),
+        images=spec["images"],
+        tpl=TEMPLATES[spec["template"]],
+        k=spec["k"],
+        version=store.version(),
+    )
 
-    print("Testing 4")
-    if name == "Legal Consultant":
-        return dict(
-            vector=FAISS.load_local(
-                os.path.join(BASE_DIR, "legal_faiss"),
-                embedding,
-                allow_dangerous_deserialization=True,
-            ),
-            images={},  # likely not needed unless you want legal diagrams or infographics
-            tpl=LEGAL_PROMPT,
-        )
-    print("Unknown Project")
-    raise ValueError("Unknown project")
+
+def warm_projects(names=None):
+    """Preload FAISS indexes at startup so the first chat turn doesn't pay for it."""
+    registry.warm(get_embedding(), names or catalog.index_names("projects"))
 
 
 # ──────────────────────────────────────────────────────────────────────────────
-# tiny helper for LLM calls with explicit history
-def _ask_llm(prompt: str, history: list[dict]):
+# tiny helpers for LLM calls with explicit history
+def _history_messages(history: list[dict]):
     messages = []
     for h in history:
         if h["role"] == "user":
             messages.append(HumanMessage(content=h["content"]))
+        elif h["role"] == "system":   # running summary from chat_history
+            messages.append(SystemMessage(content=h["content"]))
         else:
             messages.append(AIMessage(content=h["content"]))
-    messages.append(HumanMessage(content=prompt))
+    return messages
+
+
+def _messages(prompt: str, history: list[dict]):
+    return _history_messages(history) + [HumanMessage(content=prompt)]
 
-    return llm.invoke(messages).content.strip()
+
+# Answer turns are laid out for OpenAI's automatic prompt caching, which reuses
+# the longest previously-seen prefix of a request:
+#   1. system  – tone line + project template + voice rules; byte-identical on
+#                every turn of a (project, voice_mode), so always a cache hit
+#   2. history – earlier turns, unchanged since the previous request
+#   3. human   – retrieved CONTEXT + the USER message, the only new part
+# The latest user message is the last item of `history`; it goes out once, in 3.
+def _turn_messages(turn: dict, history: list[dict]):
+    return ([SystemMessage(content=turn["system"])]
+            + _history_messages(history[:-1])
+            + [HumanMessage(content=turn["prompt"])])
+
+
+_usage = {"calls": 0, "input_tokens": 0, "cached_tokens": 0}
+_usage_lock = threading.Lock()
+
+
+def _record_usage(message) -> None:
+    """Count prompt / cached tokens of an LLM reply (AIMessage or final stream chunk)."""
+    usage = getattr(message, "usage_metadata", None) or {}
+    prompt_tokens = usage.get("input_tokens")
+    cached = (usage.get("input_token_details") or {}).get("cache_read")
+    if prompt_tokens is None:   # older langchain-openai: raw OpenAI usage block
+        token_usage = (getattr(message, "response_metadata", None) or {}).get("token_usage") or {}
+        prompt_tokens = token_usage.get("prompt_tokens")
+        cached = (token_usage.get("prompt_tokens_details") or {}).get("cached_tokens")
+    if prompt_tokens is None:
+        return
+    with _usage_lock:
+        _usage["calls"] += 1
+        _usage["input_tokens"] += prompt_tokens
+        _usage["cached_tokens"] += cached or 0
+    print(f"[DEBUG] Prompt tokens: {prompt_tokens}, cached: {cached or 0}")
+
+
+def prompt_cache_stats() -> dict:
+    """Prompt tokens sent, and served from the provider's cache, since start-up."""
+    with _usage_lock:
+        stats = dict(_usage)
+    stats["cached_ratio"] = (stats["cached_tokens"] / stats["input_tokens"]
+                             if stats["input_tokens"] else 0.0)
+    return stats
+
+
+def _ask_llm(prompt: str, history: list[dict]):
+    return get_llm().invoke(_messages(prompt, history)).content.strip()
+
+
+def _chunk_id(doc) -> str:
+    # pickled stores don't always carry Document.id; fall back to a content hash
+    return getattr(doc, "id", None) or hashlib.sha1(doc.page_content.encode("utf-8")).hexdigest()
+
+
+def _dialog_key(history: list[dict]):
+    """
+    What a follow-up's answer depends on besides the query: the last AI reply
+    (and running summary) before the latest user message. None on a first turn.
+    """
+    earlier = history[:-1]
+    last_ai = next((h["content"] for h in reversed(earlier)
+                    if h["role"] not in ("user", "system")), None)
+    summary = next((h["content"] for h in earlier if h["role"] == "system"), None)
+    if last_ai is None and summary is None:
+        return None
+    return hashlib.sha1(f"{summary}\0{last_ai}".encode("utf-8")).hexdigest()
 
 
 # wrapper filters -------------------------------------------------------------
@@ -349,11 +353,36 @@ Text: "{text}" """
 #     return _ask_llm(g_prompt, history).upper() == "GREETING"
 
 
+VOICE_PROMPT_TEMPLATE = """
+
+You are speaking aloud to a human in voice mode.
+
+⭑ Tone & Emotion
+- Match the user's sentiment: friendly if excited, calm if unsure, concise if rushed.
+- Use a human, conversational tone — not robotic or overly formal.
+
+⭑ Style & Delivery
+- Expand abbreviations: say "square yard", not "sq. yd".
+- Speak full numbers: say "twenty thousand", not "20,000".
+- Use punctuation for natural pauses.
+
+⭑ Answering Strategy
+- Always respond in **1 natural paragraph**, not bullets.
+- Summarize everything in **around 40 words only**.
+- Do not explain every detail — highlight the most important points.
+- Always end with a **follow-up question** to keep the conversation going.
+- If the question is simple or factual (e.g., distance, direction, yes/no), answer it **briefly** — ideally 1 sentence.
+- If the question asks for full project details or comparisons, summarize it in **under 40 words**, in 1 short paragraph.
+- Always ask a relevant follow-up question to continue the conversation.
+"""
+
+
 # ──────────────────────────────────────────────────────────────────────────────
-def generate_response(project: str, history: list[dict], voice_mode: bool):
+def _prepare_turn(project: str, history: list[dict], voice_mode: bool):
     """
-    history: full chat so far, **last item must be the latest USER msg**.
-    Returns {text:str, image_url:str|None}
+    Retrieval + prompt for the latest user message in `history`.
+    Returns a dict with the prompt, the answer-cache keys and `cached`
+    (answer text on a cache hit, else None).
     """
     print("Testing")
     cfg = _project_cfg(project)
@@ -371,45 +400,92 @@ def generate_response(project: str, history: list[dict], voice_mode: bool):
     #     return dict(text="Query blocked due to policy.", image_url=None)
 
     # 2 vector context --------------------------------------------------------
-    docs = cfg["vector"].similarity_search(user_input, k=3)
-    context = "\n".join(d.page_content for d in docs)
-    VOICE_PROMPT_TEMPLATE = ""
-    if voice_mode:
-        VOICE_PROMPT_TEMPLATE = """
+    query_vec = get_embedding().embed_query(user_input)
+    docs = cfg["store"].search(query_vec, cfg["k"], cfg["filter"], user_input)
+    return _finish_turn(project, voice_mode, cfg, history, query_vec, docs)
 
-You are speaking aloud to a human in voice mode.
 
-⭑ Tone & Emotion
-- Match the user's sentiment: friendly if excited, calm if unsure, concise if rushed.
-- Use a human, conversational tone — not robotic or overly formal.
+async def _aprepare_turn(project: str, history: list[dict], voice_mode: bool):
+    """Async twin of _prepare_turn: embedding + search don't block the event loop."""
+    cfg = await asyncio.to_thread(_project_cfg, project)   # may hit disk / network
+    user_input = history[-1]["content"]
+    query_vec = await get_embedding().aembed_query(user_input)
+    docs = await cfg["store"].asearch(query_vec, cfg["k"], cfg["filter"], user_input)
+    return _finish_turn(project, voice_mode, cfg, history, query_vec, docs)
 
-⭑ Style & Delivery
-- Expand abbreviations: say "square yard", not "sq. yd".
-- Speak full numbers: say "twenty thousand", not "20,000".
-- Use punctuation for natural pauses.
 
-⭑ Answering Strategy
-- Always respond in **1 natural paragraph**, not bullets.
-- Summarize everything in **around 40 words only**.
-- Do not explain every detail — highlight the most important points.
-- Always end with a **follow-up question** to keep the conversation going.
-- If the question is simple or factual (e.g., distance, direction, yes/no), answer it **briefly** — ideally 1 sentence.
-- If the question asks for full project details or comparisons, summarize it in **under 40 words**, in 1 short paragraph.
-- Always ask a relevant follow-up question to continue the conversation.
-"""
-
-    # 3 main prompt -----------------------------------------------------------
-    prompt = (
+@functools.lru_cache(maxsize=64)
+def _system_prompt(tpl: str, image_keywords: str, voice_mode: bool) -> str:
+    # the template's {context} / {query} slots point at the final message instead
+    # of holding per-turn text, so this string never changes for a project
+    return (
         "Analyze the user's emotional tone and respond accordingly.\n\n"
-        + cfg["tpl"].format(
-            context=context,
-            query=user_input,
-            image_keywords=", ".join(cfg.get("images", {}).keys()),
+        + tpl.format(
+            context="(given under CONTEXT in the latest user message)",
+            query="(given under USER in the latest user message)",
+            image_keywords=image_keywords,
         )
-        + VOICE_PROMPT_TEMPLATE
+        + (VOICE_PROMPT_TEMPLATE if voice_mode else "")
     )
-    answer = _ask_llm(prompt, history)
+
+
+def _finish_turn(project, voice_mode, cfg, history, query_vec, docs):
+    """Answer-cache lookup and prompt assembly shared by the sync and async paths."""
+    user_input = history[-1]["content"]
+    context = "\n".join(d.page_content for d in docs)
+
+    turn = dict(
+        project=project,
+        voice_mode=voice_mode,
+        query_vec=query_vec,
+        chunk_ids=[_chunk_id(d) for d in docs],
+        dialog=_dialog_key(history),
+        version=cfg["version"],
+        cached=None,
+    )
+
+    # opt-in semantic cache: same project/mode, near-identical query, same chunks,
+    # same preceding AI reply ("yes please" means something else in every chat)
+    if answer_cache.ENABLED:
+        turn["cached"] = answer_cache.lookup(
+            project, voice_mode, query_vec, turn["chunk_ids"], cfg["version"], turn["dialog"]
+        )
+        if turn["cached"] is not None:
+            print(f"[DEBUG] Answer cache hit: {answer_cache.stats()}")
+            return turn
+
+    # 3 main prompt -----------------------------------------------------------
+    # static instructions first, per-turn text last (see _turn_messages)
+    turn["system"] = _system_prompt(
+        cfg["tpl"], ", ".join(cfg.get("images", {}).keys()), voice_mode
+    )
+    turn["prompt"] = f"CONTEXT:\n{context}\n\nUSER:\n{user_input}"
+    return turn
+
+
+def _remember(turn: dict, answer: str, started: float) -> None:
+    if answer_cache.ENABLED:
+        answer_cache.store(turn["project"], turn["voice_mode"], turn["query_vec"],
+                           turn["chunk_ids"], turn["version"],
+                           answer, time.perf_counter() - started, turn["dialog"])
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+def generate_response(project: str, history: list[dict], voice_mode: bool):
+    """
+    history: full chat so far, **last item must be the latest USER msg**.
+    Returns {text:str, image_url:str|None}
+    """
+    turn = _prepare_turn(project, history, voice_mode)
+    if turn["cached"] is not None:
+        return dict(text=turn["cached"], image_url=None)
+
+    started = time.perf_counter()
+    reply = get_llm().invoke(_turn_messages(turn, history))
+    _record_usage(reply)
+    answer = reply.content.strip()
     print(f"[DEBUG] Generated answer: {answer}")
+    _remember(turn, answer, started)
 
     # 4 policy check on answer ------------------------------------------------
     # if _violates_policy(answer, history):
@@ -430,3 +506,61 @@ You are speaking aloud to a human in voice mode.
     #         print(f"[WARN] No image found for keyword: '{keyword}'")
 
     return dict(text=answer, image_url=None)
+
+
+def stream_response(project: str, history: list[dict], voice_mode: bool):
+    """
+    Same as generate_response but yields the answer text piece by piece as
+    the model produces it (a cached answer is yielded in one piece).
+    """
+    turn = _prepare_turn(project, history, voice_mode)
+    if turn["cached"] is not None:
+        yield turn["cached"]
+        return
+
+    started = time.perf_counter()
+    parts = []
+    for chunk in get_llm().stream(_turn_messages(turn, history)):
+        if chunk.content:
+            parts.append(chunk.content)
+            yield chunk.content
+        if chunk.usage_metadata:   # final chunk
+            _record_usage(chunk)
+    answer = "".join(parts).strip()
+    print(f"[DEBUG] Streamed answer: {answer}")
+    _remember(turn, answer, started)
+
+
+async def agenerate_response(project: str, history: list[dict], voice_mode: bool):
+    """Async generate_response for the ASGI entry point (asgi.py)."""
+    turn = await _aprepare_turn(project, history, voice_mode)
+    if turn["cached"] is not None:
+        return dict(text=turn["cached"], image_url=None)
+
+    started = time.perf_counter()
+    reply = await get_llm().ainvoke(_turn_messages(turn, history))
+    _record_usage(reply)
+    answer = reply.content.strip()
+    print(f"[DEBUG] Generated answer: {answer}")
+    _remember(turn, answer, started)
+    return dict(text=answer, image_url=None)
+
+
+async def astream_response(project: str, history: list[dict], voice_mode: bool):
+    """Async stream_response: yields answer text pieces from llm.astream."""
+    turn = await _aprepare_turn(project, history, voice_mode)
+    if turn["cached"] is not None:
+        yield turn["cached"]
+        return
+
+    started = time.perf_counter()
+    parts = []
+    async for chunk in get_llm().astream(_turn_messages(turn, history)):
+        if chunk.content:
+            parts.append(chunk.content)
+            yield chunk.content
+        if chunk.usage_metadata:   # final chunk
+            _record_usage(chunk)
+    answer = "".join(parts).strip()
+    print(f"[DEBUG] Streamed answer: {answer}")
+    _remember(turn, answer, started)
@@ -0,0 +1,58 @@
+"""
+Chatbot/catalog.py
+Reads Chatbot/projects.json – the one place that describes every project the
+bots answer for: FAISS index directory (or "backend": "qdrant" + "collection",
+see vectorstores.py), optional metadata "filter", prompt template name, image
+map and retrieval k.
+
+Sections:
+  "projects"     – projects served by bot.generate_response (keyed by display name)
+  "general_bot"  – projects realestatebot can pull context from (keyed by lower-case name)
+"""
+
+import json
+import os
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CATALOG_PATH = os.getenv("PROJECT_CATALOG", os.path.join(BASE_DIR, "projects.json"))
+DEFAULT_K = 3
+
+_catalog = None
+
+
+def load() -> dict:
+    global _catalog
+    if _catalog is None:
+        with open(CATALOG_PATH, encoding="utf-8") as f:
+            _catalog = json.load(f)
+    return _catalog
+
+
+def reload() -> dict:
+    global _catalog
+    _catalog = None
+    return load()
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+def project(name: str, section: str = "projects") -> dict:
+    spec = load().get(section, {}).get(name)
+    if spec is None:
+        print(f"Unknown Project: {name}")
+        raise ValueError("Unknown project")
+    return dict(spec, k=spec.get("k", DEFAULT_K), images=spec.get("images", {}))
+
+
+def names(section: str = "projects") -> list[str]:
+    return list(load().get(section, {}))
+
+
+def index_names(section: str = None) -> list[str]:
+    """Every FAISS directory referenced by the catalog (or by one section of it)."""
+    sections = [section] if section else list(load())
+    return sorted({
+        spec["index"]
+        for sec in sections
+        for spec in load().get(sec, {}).values()
+        if spec.get("index")
+    })
@@ -0,0 +1,137 @@
+"""
+Chatbot/embed_cache.py
+Query-embedding cache in front of OpenAIEmbeddings.
+
+Users repeat the same questions ("price?", "location", "payment plan"), and
+every FAISS similarity_search embeds the query over the network first. The
+wrapper keys embeddings by normalised text and keeps them in
+
+  1. an in-process LRU (EMBED_CACHE_SIZE entries, EMBED_CACHE_TTL seconds)
+  2. optionally Redis, shared by every worker (EMBED_CACHE_REDIS_URL, e.g. the
+     Celery broker redis://localhost:6379/0) with the same TTL
+
+Only queries are cached; embed_documents (index building) goes straight through.
+"""
+
+import hashlib
+import os
+import re
+import threading
+import time
+from array import array
+from collections import OrderedDict
+
+from langchain_core.embeddings import Embeddings
+
+CACHE_SIZE = int(os.getenv("EMBED_CACHE_SIZE", "2048"))
+CACHE_TTL = int(os.getenv("EMBED_CACHE_TTL", str(24 * 3600)))
+REDIS_URL = os.getenv("EMBED_CACHE_REDIS_URL")
+
+# one LRU per process, shared by every wrapped embedder (keys include the model)
+_lru = OrderedDict()   # key -> (expires_at, vector)
+_lock = threading.Lock()
+_stats = {"local_hits": 0, "redis_hits": 0, "misses": 0}
+_redis = None
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+def normalize(text: str) -> str:
+    text = re.sub(r"\s+", " ", text.strip().lower())
+    return text.strip(" ?!.,;:")
+
+
+def _redis_client():
+    global _redis
+    if _redis is None and REDIS_URL:
+        import redis
+        _redis = redis.Redis.from_url(REDIS_URL, socket_timeout=0.05,
+                                      socket_connect_timeout=0.05)
+    return _redis
+
+
+def _count(key: str) -> None:
+    with _lock:
+        _stats[key] += 1
+
+
+def stats() -> dict:
+    with _lock:
+        total = sum(_stats.values())
+        hits = _stats["local_hits"] + _stats["redis_hits"]
+        return dict(_stats, size=len(_lru), hit_ratio=hits / total if total else 0.0)
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+class CachedEmbeddings(Embeddings):
+    def __init__(self, inner: Embeddings, namespace: str = None):
+        self.inner = inner
+        self.namespace = namespace or getattr(inner, "model", type(inner).__name__)
+
+    def _key(self, text: str) -> str:
+        digest = hashlib.sha1(normalize(text).encode("utf-8")).hexdigest()
+        return f"emb:{self.namespace}:{digest}"
+
+    def _get(self, key: str):
+        now = time.time()
+        with _lock:
+            hit = _lru.get(key)
+            if hit and hit[0] > now:
+                _lru.move_to_end(key)
+                _stats["local_hits"] += 1
+                return hit[1]
+            if hit:
+                _lru.pop(key)
+
+        r = _redis_client()
+        if r is not None:
+            try:
+                raw = r.get(key)
+            except Exception as e:
+                print(f"[WARN] embedding cache redis get failed: {e}")
+                raw = None
+            if raw:
+                vec = array("f", raw).tolist()
+                self._put_local(key, vec)
+                _count("redis_hits")
+                return vec
+        _count("misses")
+        return None
+
+    def _put_local(self, key: str, vec: list[float]) -> None:
+        with _lock:
+            _lru[key] = (time.time() + CACHE_TTL, vec)
+            _lru.move_to_end(key)
+            while len(_lru) > CACHE_SIZE:
+                _lru.popitem(last=False)
+
+    def _put(self, key: str, vec: list[float]) -> None:
+        self._put_local(key, vec)
+        r = _redis_client()
+        if r is not None:
+            try:
+                r.setex(key, CACHE_TTL, array("f", vec).tobytes())
+            except Exception as e:
+                print(f"[WARN] embedding cache redis set failed: {e}")
+
+    # ── Embeddings interface ────────────────────────────────────────────────
+    def embed_query(self, text: str) -> list[float]:
+        key = self._key(text)
+        vec = self._get(key)
+        if vec is None:
+            vec = self.inner.embed_query(normalize(text) or text)
+            self._put(key, vec)
+        return vec
+
+    async def aembed_query(self, text: str) -> list[float]:
+        key = self._key(text)
+        vec = self._get(key)
+        if vec is None:
+            vec = await self.inner.aembed_query(normalize(text) or text)
+            self._put(key, vec)
+        return vec
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return self.inner.embed_documents(texts)
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        return await self.inner.aembed_documents(texts)
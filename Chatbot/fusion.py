@@ -0,0 +1,64 @@
+"""
+Chatbot/fusion.py
+Merging ranked retrieval results from several searches into one list.
+
+Reciprocal-rank fusion scores a chunk by sum(1 / (RRF_K + rank)) over the lists
+it appears in. Ranks, not raw scores, are combined, so FAISS and Qdrant results,
+or lexical and dense ones, can be merged without calibrating their scores.
+Ties (e.g. the top hit of two projects) are broken by the chunk's best rank in
+any list, then by list order – never by the raw "score" metadata, which is a
+cosine similarity on one side and an unbounded BM25 score on the other.
+
+Near-identical chunks (brochure text repeated across indexes, overlapping
+splits) are dropped: same normalised text, or word-set Jaccard similarity of
+DEDUPE_THRESHOLD or more with a chunk already kept.
+"""
+
+import os
+import re
+
+RRF_K = int(os.getenv("RRF_K", "60"))
+DEDUPE_THRESHOLD = float(os.getenv("FUSION_DEDUPE_THRESHOLD", "0.9"))
+
+
+def _key(doc) -> str:
+    # by text: pickled stores don't always carry Document.id, and the same chunk
+    # must collapse whether it came from the dense or the lexical side
+    return " ".join(doc.page_content.split())
+
+
+def _words(text: str) -> frozenset:
+    return frozenset(re.findall(r"\w+", text.lower()))
+
+
+def rrf(result_lists: list, rrf_k: int = RRF_K) -> list:
+    """[(doc, fused score), ...] best first, one entry per distinct chunk."""
+    fused = {}   # key -> [score, doc, (best rank, list index)]
+    for i, docs in enumerate(result_lists):
+        for rank, doc in enumerate(docs, start=1):
+            entry = fused.setdefault(_key(doc), [0.0, doc, (rank, i)])
+            entry[0] += 1.0 / (rrf_k + rank)
+            if (rank, i) < entry[2]:
+                entry[1], entry[2] = doc, (rank, i)
+    ranked = sorted(fused.values(), key=lambda e: (-e[0], e[2]))
+    return [(doc, score) for score, doc, _ in ranked]
+
+
+def dedupe(docs: list, threshold: float = DEDUPE_THRESHOLD) -> list:
+    kept, seen_text, seen_words = [], set(), []
+    for doc in docs:
+        text = " ".join(doc.page_content.lower().split())
+        if text in seen_text:
+            continue
+        words = _words(text)
+        if words and any(len(words & w) / len(words | w) >= threshold for w in seen_words):
+            continue
+        kept.append(doc)
+        seen_text.add(text)
+        seen_words.append(words)
+    return kept
+
+
+def fuse(result_lists: list, top_k: int, rrf_k: int = RRF_K) -> list:
+    """RRF-merge several ranked Document lists, drop near-duplicates, keep top_k."""
+    return dedupe([doc for doc, _ in rrf(result_lists, rrf_k)])[:top_k]
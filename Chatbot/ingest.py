@@ -0,0 +1,227 @@
+"""
+Chatbot/ingest.py
+Incremental ingestion of a directory of project documents into a *_faiss index.
+
+Each chunk's id is a content hash, sha256(source file + chunk text), and
+`manifest.json` next to the index records, per source file, its sha256 and the
+ids of its chunks. A run then only
+
+  - skips files whose bytes did not change (not even loaded),
+  - re-splits changed files and embeds the chunks whose ids are new,
+  - deletes the vectors of chunks (and files) that disappeared,
+
+editing the index in place. Updating one brochure re-embeds a handful of chunks
+instead of the whole corpus. Files are processed one at a time (load → split →
+embed → add), so memory stays flat however big the directory is.
+
+An index without a manifest (built by the old vectord.py), or one built with
+another embedding model / chunking, is rebuilt from scratch once. If the index
+was converted for mmap (mmap_store.py) it is converted again, and the BM25
+index (bm25.json, lexical.py) is rebuilt.
+
+    python -m Chatbot.ingest docs/riverside riverside_faiss
+    python -m Chatbot.ingest docs/riverside riverside_faiss --dry-run
+"""
+
+import argparse
+import datetime
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+
+from dotenv import load_dotenv
+from langchain_community.document_loaders import UnstructuredFileLoader
+from langchain_community.vectorstores import FAISS
+from langchain_openai import OpenAIEmbeddings
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+try:
+    from Chatbot import lexical, mmap_store, registry
+except ImportError:  # run from inside Chatbot/
+    import lexical
+    import mmap_store
+    import registry
+
+load_dotenv()
+
+MANIFEST_FILE = "manifest.json"
+EXTENSIONS = (".docx", ".doc", ".pdf", ".txt", ".md", ".pptx", ".html")
+CHUNK_SIZE = 1000
+CHUNK_OVERLAP = 100
+EMBED_BATCH = 128
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+def _sha256_file(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def chunk_id(source: str, text: str) -> str:
+    return hashlib.sha256(f"{source}\0{text}".encode("utf-8")).hexdigest()
+
+
+def _walk(docs_dir: str):
+    """Relative paths of every supported document under docs_dir, sorted."""
+    found = []
+    for root, _, files in os.walk(docs_dir):
+        for fname in files:
+            if fname.lower().endswith(EXTENSIONS) and not fname.startswith("~$"):
+                found.append(os.path.relpath(os.path.join(root, fname), docs_dir).replace(os.sep, "/"))
+    return sorted(found)
+
+
+def _read_manifest(path: str):
+    try:
+        with open(os.path.join(path, MANIFEST_FILE), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_json(path: str, data: dict) -> None:
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+def _save(vec: FAISS, path: str) -> None:
+    # write next to the index, then swap the files in: each file is replaced
+    # atomically, so no reader sees a half-written one. The pair is not swapped
+    # as one unit – a load between the two renames can pair the new index.faiss
+    # with the old index.pkl. The registry reloads as soon as the second rename
+    # changes the signature, so that mix lives for at most one load; run ingest
+    # off-peak if even that matters.
+    os.makedirs(path, exist_ok=True)
+    tmp = tempfile.mkdtemp(prefix=".ingest-", dir=path)
+    try:
+        vec.save_local(tmp)
+        for fname in registry.INDEX_FILES:
+            os.replace(os.path.join(tmp, fname), os.path.join(path, fname))
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+def ingest(docs_dir: str, index: str, project: str = None, dry_run: bool = False,
+           chunk_size: int = CHUNK_SIZE, chunk_overlap: int = CHUNK_OVERLAP) -> dict:
+    """Bring the index `index` in line with `docs_dir`; returns run stats."""
+    path = registry._index_path(index)
+    embedding = OpenAIEmbeddings()
+    splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    settings = {"embedding_model": embedding.model,
+                "chunk_size": chunk_size, "chunk_overlap": chunk_overlap}
+
+    manifest = _read_manifest(path)
+    has_index = os.path.exists(os.path.join(path, "index.faiss"))
+    if manifest is not None and {k: manifest.get(k) for k in settings} != settings:
+        print(f"⚠️ {index}: embedding model or chunking changed – rebuilding")
+        manifest = None
+    elif manifest is None and has_index:
+        print(f"⚠️ {index}: no {MANIFEST_FILE} – rebuilding once so chunks can be tracked")
+
+    vec = None
+    if manifest is not None and has_index:
+        vec = FAISS.load_local(path, embedding, allow_dangerous_deserialization=True)
+    old_files = (manifest or {}).get("files", {}) if vec is not None else {}
+
+    stats = dict(files=0, unchanged=0, changed=0, removed=0,
+                 chunks_added=0, chunks_deleted=0, chunks_kept=0)
+    files = {}
+    to_delete = []
+
+    current = _walk(docs_dir)
+    for rel in set(old_files) - set(current):
+        stats["removed"] += 1
+        to_delete += old_files[rel]["chunks"]
+
+    for rel in current:
+        stats["files"] += 1
+        digest = _sha256_file(os.path.join(docs_dir, rel))
+        old = old_files.get(rel)
+        if old is not None and old["sha256"] == digest:
+            stats["unchanged"] += 1
+            stats["chunks_kept"] += len(old["chunks"])
+            files[rel] = old
+            continue
+
+        stats["changed"] += 1
+        raw = UnstructuredFileLoader(os.path.join(docs_dir, rel)).load()
+        chunks, ids = [], []
+        for doc in splitter.split_documents(raw):
+            cid = chunk_id(rel, doc.page_content)
+            if cid not in ids:   # identical chunks inside one file
+                chunks.append(doc)
+                ids.append(cid)
+        files[rel] = {"sha256": digest, "chunks": ids}
+
+        known, current_ids = set(old["chunks"]) if old else set(), set(ids)
+        to_delete += [cid for cid in known if cid not in current_ids]
+        new = [(cid, doc) for cid, doc in zip(ids, chunks) if cid not in known]
+        stats["chunks_kept"] += len(ids) - len(new)
+        stats["chunks_added"] += len(new)
+        print(f"📄 {rel}: {len(ids)} chunks, {len(new)} new")
+        if dry_run or not new:
+            continue
+
+        for start in range(0, len(new), EMBED_BATCH):
+            batch = new[start:start + EMBED_BATCH]
+            texts = [doc.page_content for _, doc in batch]
+            metadatas = [dict(source=rel, **({"project": project} if project else {}))
+                         for _ in batch]
+            pairs = list(zip(texts, embedding.embed_documents(texts)))
+            batch_ids = [cid for cid, _ in batch]
+            if vec is None:
+                vec = FAISS.from_embeddings(pairs, embedding, metadatas=metadatas, ids=batch_ids)
+            else:
+                vec.add_embeddings(pairs, metadatas=metadatas, ids=batch_ids)
+
+    stats["chunks_deleted"] = len(to_delete)
+    if dry_run:
+        return stats
+    if to_delete and vec is not None:
+        vec.delete(to_delete)
+    if vec is None:
+        print(f"⚠️ {index}: no documents found in {docs_dir}, nothing written")
+        return stats
+
+    _save(vec, path)
+    _write_json(os.path.join(path, MANIFEST_FILE), dict(
+        settings,
+        docs_dir=os.path.abspath(docs_dir),
+        updated_at=datetime.datetime.utcnow().isoformat(timespec="seconds"),
+        vectors=vec.index.ntotal,
+        files=files,
+    ))
+    if all(os.path.exists(os.path.join(path, f)) for f in mmap_store.MMAP_FILES[1:]):
+        mmap_store.convert(path)   # keep the mapped copy in step with index.pkl
+    lexical.build(path)
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Incrementally (re)build a FAISS index from a folder of documents.")
+    parser.add_argument("docs_dir", help="directory of project documents (walked recursively)")
+    parser.add_argument("index", help="index directory, e.g. riverside_faiss (relative to Chatbot/)")
+    parser.add_argument("--project", help="project name stored in every chunk's metadata")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--chunk-overlap", type=int, default=CHUNK_OVERLAP)
+    parser.add_argument("--dry-run", action="store_true", help="report what would change, write nothing")
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.docs_dir):
+        sys.exit(f"❌ Not a directory: {args.docs_dir}")
+    stats = ingest(args.docs_dir, args.index, project=args.project, dry_run=args.dry_run,
+                   chunk_size=args.chunk_size, chunk_overlap=args.chunk_overlap)
+    print(f"✅ {args.index}: " + ", ".join(f"{k}={v}" for k, v in stats.items()))
+
+
+if __name__ == "__main__":
+    main()
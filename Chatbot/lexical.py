@@ -0,0 +1,164 @@
+"""
+Chatbot/lexical.py
+In-process BM25 index per *_faiss directory, for hybrid (lexical + dense) search.
+
+Dense search misses exact terms buyers type – plot numbers, "RERA", prices,
+amenity names. `build()` writes bm25.json next to index.faiss: the chunks
+(text, metadata, docstore id) and an inverted index term -> [[row, tf], ...].
+`search()` scores BM25 over the postings of the query terms only, so a query
+costs well under a millisecond in-process.
+
+Projects with "hybrid": true in projects.json fuse these hits with the dense
+ones (vectorstores.HybridStore). ingest.py rebuilds bm25.json after every run;
+for indexes built another way:
+
+    python -m Chatbot.lexical                  # every *_faiss dir
+    python -m Chatbot.lexical krupalfinal_faiss
+"""
+
+import json
+import math
+import os
+import re
+import sys
+import threading
+
+from langchain_core.documents import Document
+
+BM25_FILE = "bm25.json"
+K1 = 1.5
+B = 0.75
+
+_STOPWORDS = frozenset(
+    "a an and are as at be by can do for from has have how i in is it me my of on or "
+    "our so that the their there this to us was we what when where which who why will "
+    "with you your".split()
+)
+
+_indexes = {}   # path -> (mtime_ns, _Bm25)
+_lock = threading.Lock()
+
+
+def tokenize(text: str) -> list[str]:
+    # "₹20,000" / "1,00,000" -> "20000" / "100000", "Plot-12B" -> "plot", "12b"
+    text = re.sub(r"(?<=\d),(?=\d)", "", text.lower())
+    return [t for t in re.findall(r"\w+", text) if t not in _STOPWORDS]
+
+
+class _Bm25:
+    def __init__(self, data: dict):
+        self.docs = data["docs"]                 # [{"id", "text", "metadata"}, ...]
+        self.lengths = data["lengths"]
+        self.postings = data["postings"]         # term -> [[row, tf], ...]
+        n = len(self.docs)
+        self.avg_len = (sum(self.lengths) / n) if n else 0.0
+        self.idf = {
+            term: math.log(1 + (n - len(p) + 0.5) / (len(p) + 0.5))
+            for term, p in self.postings.items()
+        }
+        # length normalisation per row, computed once instead of per posting
+        self.norms = [K1 * (1 - B + B * length / (self.avg_len or 1.0)) for length in self.lengths]
+
+    def scores(self, query: str) -> dict:
+        scores = {}
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = self.idf[term]
+            for row, tf in postings:
+                scores[row] = scores.get(row, 0.0) + idf * tf * (K1 + 1) / (tf + self.norms[row])
+        return scores
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+def _matches(metadata: dict, filter: dict) -> bool:
+    for key, value in (filter or {}).items():
+        if isinstance(value, list):
+            if metadata.get(key) not in value:
+                return False
+        elif metadata.get(key) != value:
+            return False
+    return True
+
+
+def is_current(path: str) -> bool:
+    """bm25.json exists and is not older than the index it was built from."""
+    bm25 = os.path.join(path, BM25_FILE)
+    pkl = os.path.join(path, "index.pkl")
+    if not os.path.exists(bm25):
+        return False
+    return not os.path.exists(pkl) or os.stat(bm25).st_mtime_ns >= os.stat(pkl).st_mtime_ns
+
+
+def _load(path: str):
+    file = os.path.join(path, BM25_FILE)
+    mtime = os.stat(file).st_mtime_ns
+    with _lock:
+        cached = _indexes.get(path)
+        if cached and cached[0] == mtime:
+            return cached[1]
+    with open(file, encoding="utf-8") as f:
+        index = _Bm25(json.load(f))
+    with _lock:
+        _indexes[path] = (mtime, index)
+    return index
+
+
+def search(path: str, query: str, k: int, filter: dict = None) -> list[Document]:
+    """Top-k BM25 hits as Documents (metadata "score" = BM25 score); [] if no index."""
+    if not is_current(path):
+        return []
+    index = _load(path)
+    ranked = sorted(index.scores(query).items(), key=lambda kv: -kv[1])
+    hits = []
+    for row, score in ranked:
+        doc = index.docs[row]
+        if _matches(doc["metadata"], filter):
+            hits.append(Document(page_content=doc["text"],
+                                 metadata=dict(doc["metadata"], score=score),
+                                 id=doc["id"]))
+            if len(hits) == k:
+                break
+    return hits
+
+
+def build(path: str) -> int:
+    """Write bm25.json for the pickled FAISS store at `path`; returns row count."""
+    from langchain_community.vectorstores import FAISS
+
+    vec = FAISS.load_local(path, None, allow_dangerous_deserialization=True)
+    ids = [vec.index_to_docstore_id[row] for row in range(vec.index.ntotal)]
+    return write(path, [(_id, vec.docstore.search(_id)) for _id in ids])
+
+
+def write(path: str, chunks: list) -> int:
+    """Write bm25.json for [(docstore id, Document), ...] in index order; returns row count."""
+    docs, lengths, postings = [], [], {}
+    for row, (_id, doc) in enumerate(chunks):
+        tokens = tokenize(doc.page_content)
+        docs.append({"id": _id, "text": doc.page_content, "metadata": doc.metadata})
+        lengths.append(len(tokens))
+        counts = {}
+        for t in tokens:
+            counts[t] = counts.get(t, 0) + 1
+        for t, tf in counts.items():
+            postings.setdefault(t, []).append([row, tf])
+
+    tmp = os.path.join(path, BM25_FILE + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"docs": docs, "lengths": lengths, "postings": postings}, f, ensure_ascii=False)
+    os.replace(tmp, os.path.join(path, BM25_FILE))
+    return len(docs)
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+if __name__ == "__main__":
+    try:
+        from Chatbot import registry
+    except ImportError:
+        import registry
+
+    for name in sys.argv[1:] or registry.available():
+        rows = build(registry._index_path(name))
+        print(f"✅ {name}: {rows} docs indexed for BM25")
@@ -0,0 +1,163 @@
+"""
+Chatbot/mmap_store.py
+Memory-mapped storage for the *_faiss indexes.
+
+`index.pkl` is a pickled docstore that every process has to unpickle into its
+own private heap. `convert()` rewrites it next to the index as
+
+  docstore.jsonl        one JSON record per FAISS row: {"id", "page_content", "metadata"}
+  docstore.offsets.npy  uint64 byte offsets into docstore.jsonl (n + 1 entries)
+
+`load()` opens index.faiss with FAISS' mmap flags and reads documents straight
+out of the mapped jsonl, so gunicorn / Celery / voice processes on one host
+share a single page-cache copy and a cold start costs a few syscalls.
+
+    python -m Chatbot.mmap_store                  # convert every *_faiss dir
+    python -m Chatbot.mmap_store legal_faiss ...  # convert selected ones
+"""
+
+import json
+import mmap
+import os
+import sys
+
+import numpy as np
+from langchain_community.docstore.base import Docstore
+from langchain_core.documents import Document
+
+DOCSTORE_FILE = "docstore.jsonl"
+OFFSETS_FILE = "docstore.offsets.npy"
+MMAP_FILES = ("index.faiss", DOCSTORE_FILE, OFFSETS_FILE)
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+class MappedDocstore(Docstore):
+    """Read-only docstore backed by docstore.jsonl; ids are FAISS row numbers."""
+
+    def __init__(self, path: str):
+        self._file = open(os.path.join(path, DOCSTORE_FILE), "rb")
+        self._buf = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._offsets = np.load(os.path.join(path, OFFSETS_FILE), mmap_mode="r")
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def search(self, search: int):
+        i = int(search)
+        if not 0 <= i < len(self):
+            return f"ID {search} not found."
+        rec = json.loads(self._buf[int(self._offsets[i]):int(self._offsets[i + 1])])
+        return Document(id=rec["id"], page_content=rec["page_content"],
+                        metadata=rec["metadata"])
+
+
+class _RowIds(dict):
+    """index_to_docstore_id for a mapped store: row i lives under docstore id i."""
+
+    def __init__(self, n: int):
+        super().__init__()
+        self._n = n
+
+    def __getitem__(self, i):
+        return int(i)
+
+    def __len__(self):
+        return self._n
+
+    def __iter__(self):
+        return iter(range(self._n))
+
+    def __contains__(self, i):
+        return 0 <= int(i) < self._n
+
+    def get(self, i, default=None):
+        return int(i) if i in self else default
+
+    def keys(self):
+        return range(self._n)
+
+    def values(self):
+        return range(self._n)
+
+    def items(self):
+        return ((i, i) for i in range(self._n))
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+def is_converted(path: str) -> bool:
+    """True when the mapped files exist and are newer than index.pkl."""
+    if not all(os.path.exists(os.path.join(path, f)) for f in MMAP_FILES):
+        return False
+    pkl = os.path.join(path, "index.pkl")
+    if not os.path.exists(pkl):
+        return True
+    return os.stat(os.path.join(path, DOCSTORE_FILE)).st_mtime_ns >= os.stat(pkl).st_mtime_ns
+
+
+def _read_index_mmap(path: str):
+    # IO_FLAG_MMAP_IFC (faiss >= 1.10) maps flat codes zero-copy; older builds
+    # only honour IO_FLAG_MMAP for inverted lists and read flat codes normally.
+    import faiss
+
+    flags = getattr(faiss, "IO_FLAG_MMAP_IFC", 0) or faiss.IO_FLAG_MMAP
+    flags |= faiss.IO_FLAG_READ_ONLY
+    try:
+        return faiss.read_index(path, flags)
+    except RuntimeError as e:
+        print(f"[WARN] mmap read failed for {path}, reading normally: {e}")
+        return faiss.read_index(path)
+
+
+def load(path: str, embedding):
+    from langchain_community.vectorstores import FAISS
+
+    index = _read_index_mmap(os.path.join(path, "index.faiss"))
+    docstore = MappedDocstore(path)
+    if len(docstore) != index.ntotal:
+        raise ValueError(f"{path}: docstore has {len(docstore)} rows, index has {index.ntotal}")
+    return FAISS(
+        embedding_function=embedding,
+        index=index,
+        docstore=docstore,
+        index_to_docstore_id=_RowIds(index.ntotal),
+    )
+
+
+def convert(path: str) -> int:
+    """Write docstore.jsonl + offsets for the pickled store at `path`; returns row count."""
+    from langchain_community.vectorstores import FAISS
+
+    vec = FAISS.load_local(path, None, allow_dangerous_deserialization=True)
+
+    doc_tmp = os.path.join(path, DOCSTORE_FILE + ".tmp")
+    offsets = [0]
+    with open(doc_tmp, "wb") as f:
+        for i in range(vec.index.ntotal):
+            _id = vec.index_to_docstore_id[i]
+            doc = vec.docstore.search(_id)
+            line = json.dumps(
+                {"id": _id, "page_content": doc.page_content, "metadata": doc.metadata},
+                ensure_ascii=False,
+            ).encode("utf-8") + b"\n"
+            f.write(line)
+            offsets.append(offsets[-1] + len(line))
+
+    off_tmp = os.path.join(path, "docstore.offsets.tmp.npy")
+    np.save(off_tmp, np.asarray(offsets, dtype=np.uint64))
+
+    # replace atomically – processes that already mapped the old files keep them
+    os.replace(off_tmp, os.path.join(path, OFFSETS_FILE))
+    os.replace(doc_tmp, os.path.join(path, DOCSTORE_FILE))
+    return vec.index.ntotal
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+if __name__ == "__main__":
+    try:
+        from Chatbot import registry
+    except ImportError:
+        import registry
+
+    for name in sys.argv[1:] or registry.available():
+        rows = convert(registry._index_path(name))
+        print(f"✅ {name}: {rows} docs mapped")
@@ -1,66 +1,122 @@
 import os
-from langchain_openai import ChatOpenAI, OpenAIEmbeddings
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from langchain_core.messages import HumanMessage, AIMessage
-from langchain_community.vectorstores import FAISS
-import os
 from dotenv import load_dotenv
 
+try:
+    from Chatbot import catalog, fusion, router, vectorstores
+    from Chatbot.embed_cache import CachedEmbeddings
+except ImportError:  # run from inside Chatbot/
+    import catalog
+    import fusion
+    import router
+    import vectorstores
+    from embed_cache import CachedEmbeddings
+
 
 load_dotenv()
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 os.environ["OPENAI_API_KEY"] = OPENAI_API_KEY
 
-llm = ChatOpenAI(model="gpt-4.1", temperature=0.2, api_key=OPENAI_API_KEY)
-embedding = OpenAIEmbeddings(openai_api_key=OPENAI_API_KEY)
-BASE_DIR = os.getcwd()
-
-PROJECTS = {
-    "krupal habitat": {
-        "vector": FAISS.load_local(
-            os.path.join(BASE_DIR, "krupalfinal_faiss"),
-            embedding,
-            allow_dangerous_deserialization=True,
-        )
-    },
-    "ramvan villas": {
-        "vector": FAISS.load_local(
-            os.path.join(BASE_DIR, "ramvan_villas_faiss"),
-            embedding,
-            allow_dangerous_deserialization=True,
-        )
-    },
-}
+# LLM and embeddings are built on first use (as in bot.py), so importing this
+# module doesn't load langchain_openai / openai up front
+_llm = None
+_embedding = None
+_clients_lock = threading.Lock()
+
+
+def get_llm():
+    global _llm
+    if _llm is None:
+        with _clients_lock:
+            if _llm is None:
+                from langchain_openai import ChatOpenAI
+                _llm = ChatOpenAI(model="gpt-4.1", temperature=0.2, api_key=OPENAI_API_KEY)
+    return _llm
+
+
+def get_embedding():
+    global _embedding
+    if _embedding is None:
+        with _clients_lock:
+            if _embedding is None:
+                from langchain_openai import OpenAIEmbeddings
+                # repeated queries skip the embeddings round-trip (see embed_cache.py)
+                _embedding = CachedEmbeddings(OpenAIEmbeddings(openai_api_key=OPENAI_API_KEY))
+    return _embedding
+
+
+def __getattr__(name):
+    # `realestatebot.llm` / `realestatebot.embedding` still work
+    if name == "llm":
+        return get_llm()
+    if name == "embedding":
+        return get_embedding()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# comparison questions search every named project at once and keep the best
+# TOP_K chunks overall (see get_faiss_context)
+TOP_K = int(os.getenv("REALESTATE_TOP_K", "6"))
+_search_pool = ThreadPoolExecutor(max_workers=int(os.getenv("REALESTATE_SEARCH_WORKERS", "8")),
+                                  thread_name_prefix="retrieval")
+
+
+# Projects come from the "general_bot" section of Chatbot/projects.json and are
+# searched through vectorstores.py (FAISS loaded on first use, or Qdrant).
+def _project_store(name: str):
+    spec = catalog.project(name, section="general_bot")
+    return vectorstores.for_spec(spec, get_embedding()), spec["k"], spec.get("filter")
+
+
+def route_projects(user_query):
+    """Projects the message is about; the LLM is only asked when router.py can't tell."""
+    return router.route(user_query, "general_bot", embedding=get_embedding(),
+                        llm_fallback=extract_project_names)
 
 
 def extract_project_names(user_query):
     prompt = f"""
-Extract only the names of real estate projects mentioned in this query. Available projects: Krupal Habitat, Ramvan Villas. If none, return "None".
+Extract only the names of real estate projects mentioned in this query. Available projects: {", ".join(n.title() for n in catalog.names("general_bot"))}. If none, return "None".
 
 Query: "{user_query}"
 """
-    response = llm.invoke([HumanMessage(content=prompt)])
+    response = get_llm().invoke([HumanMessage(content=prompt)])
     return response.content.strip().lower()
 
 
+def _search(name, query_vec, user_query):
+    store, k, filter = _project_store(name)
+    docs = store.search(query_vec, k, filter, user_query)
+    for doc in docs:
+        doc.metadata["project"] = name
+    return docs
+
+
 def get_faiss_context(project_names, user_query):
-    if not project_names or project_names.lower() == "none":
+    """
+    Context for the named projects: the query is embedded once, every project
+    is searched concurrently, and the hits are merged by reciprocal-rank fusion
+    (fusion.py) into one de-duplicated top-TOP_K list.
+    """
+    names = [n for n in project_names or [] if n in catalog.names("general_bot")]
+    if not names:
         return None
 
-    names = [name.strip().lower() for name in project_names.split(",")]
-    context_chunks = []
-
-    for name in names:
-        project = PROJECTS.get(name)
-        if project:
-            docs = project["vector"].similarity_search(user_query, k=3)
-            context_text = (
-                "\n".join([doc.page_content for doc in docs])
-                if docs
-                else "No additional details."
-            )
-            context_chunks.append(context_text)
+    query_vec = get_embedding().embed_query(user_query)
+    if len(names) == 1:
+        results = [_search(names[0], query_vec, user_query)]
+    else:
+        results = list(_search_pool.map(lambda n: _search(n, query_vec, user_query), names))
 
-    return "\n".join(context_chunks) if context_chunks else None
+    docs = fusion.fuse(results, TOP_K)
+    if not docs:
+        return "No additional details."
+    if len(names) == 1:
+        return "\n".join(doc.page_content for doc in docs)
+    # label chunks so comparisons don't mix up which project a fact belongs to
+    return "\n".join(f"[{doc.metadata['project'].title()}] {doc.page_content}" for doc in docs)
 
 
 def build_prompt(faiss_context, user_input):
@@ -114,7 +170,7 @@ def _ask_llm(prompt, history):
             messages.append(AIMessage(content=h["content"]))
 
     messages.append(HumanMessage(content=prompt))
-    response = llm.invoke(messages)
+    response = get_llm().invoke(messages)
     return response.content.strip().replace("**", "")
 
 
@@ -133,12 +189,8 @@ def chatbot_loop():
 
         history.append({"role": "user", "content": user_input})
 
-        project_names = extract_project_names(user_input)
-        faiss_context = (
-            get_faiss_context(project_names, user_input)
-            if project_names != "none"
-            else None
-        )
+        project_names = route_projects(user_input)
+        faiss_context = get_faiss_context(project_names, user_input)
 
         prompt = build_prompt(faiss_context, user_input)
         response_text = _ask_llm(prompt, history)
@@ -0,0 +1,149 @@
+"""
+Chatbot/registry.py
+Process-wide registry of the FAISS indexes stored under Chatbot/*_faiss.
+
+Indexes are loaded lazily on first use and then served from memory. Before
+handing an index out we stat its files; it is only reloaded when
+index.faiss / index.pkl changed on disk (mtime or size).
+
+Resident indexes are kept in LRU order. When FAISS_MEMORY_BUDGET_MB is set,
+the least-recently-used ones are dropped once the budget is exceeded (size is
+estimated from the files on disk). 0 / unset means no limit.
+
+Directories converted with `python -m Chatbot.mmap_store` are opened
+memory-mapped instead of unpickled (FAISS_MMAP=0 turns that off). Mapped
+indexes live in the shared page cache and don't count against the budget.
+"""
+
+import glob
+import os
+import threading
+from collections import OrderedDict
+
+try:
+    from Chatbot import mmap_store
+except ImportError:  # run from inside Chatbot/
+    import mmap_store
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+INDEX_FILES = ("index.faiss", "index.pkl")
+MEMORY_BUDGET = int(float(os.getenv("FAISS_MEMORY_BUDGET_MB", "0")) * 1024 * 1024)
+USE_MMAP = os.getenv("FAISS_MMAP", "1") == "1"
+
+_indexes = OrderedDict()   # dir name -> (signature, size_bytes, FAISS), oldest first
+_indexes_guard = threading.Lock()
+_locks = {}                # dir name -> threading.Lock (one loader per index)
+_locks_guard = threading.Lock()
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+def _index_path(name: str) -> str:
+    return name if os.path.isabs(name) else os.path.join(BASE_DIR, name)
+
+
+def _mapped(path: str) -> bool:
+    return USE_MMAP and mmap_store.is_converted(path)
+
+
+def _signature(path: str):
+    sig = []
+    for fname in mmap_store.MMAP_FILES if _mapped(path) else INDEX_FILES:
+        st = os.stat(os.path.join(path, fname))
+        sig.append((st.st_mtime_ns, st.st_size))
+    return tuple(sig)
+
+
+def _lock_for(name: str) -> threading.Lock:
+    with _locks_guard:
+        return _locks.setdefault(name, threading.Lock())
+
+
+def _resident_bytes() -> int:
+    return sum(size for _, size, _ in _indexes.values())
+
+
+def _evict(keep: str) -> None:
+    """Drop least-recently-used indexes until we are back under the budget."""
+    if not MEMORY_BUDGET:
+        return
+    with _indexes_guard:
+        while _resident_bytes() > MEMORY_BUDGET and len(_indexes) > 1:
+            name = next(iter(_indexes))
+            if name == keep:
+                _indexes.move_to_end(name)
+                name = next(iter(_indexes))
+            _indexes.pop(name)
+            print(f"♻️ Evicted FAISS index: {name}")
+
+
+def available() -> list[str]:
+    """Names of every *_faiss directory shipped next to this module."""
+    return sorted(
+        os.path.basename(os.path.dirname(p))
+        for p in glob.glob(os.path.join(BASE_DIR, "*_faiss", "index.faiss"))
+    )
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+def get_vector(name: str, embedding):
+    """
+    Return the in-memory FAISS store for `name` (e.g. "krupalfinal_faiss"),
+    loading it on first use or when its files changed on disk.
+    """
+    path = _index_path(name)
+    sig = _signature(path)
+
+    with _indexes_guard:
+        cached = _indexes.get(name)
+        if cached and cached[0] == sig:
+            _indexes.move_to_end(name)
+            return cached[2]
+
+    with _lock_for(name):
+        # another thread may have finished loading while we waited
+        with _indexes_guard:
+            cached = _indexes.get(name)
+            if cached and cached[0] == sig:
+                _indexes.move_to_end(name)
+                return cached[2]
+
+        print(f"🟡 Loading FAISS index: {name}")
+        if _mapped(path):
+            vec = mmap_store.load(path, embedding)
+            size = 0
+        else:
+            from langchain_community.vectorstores import FAISS
+            vec = FAISS.load_local(path, embedding, allow_dangerous_deserialization=True)
+            size = sum(s for _, s in sig)
+        with _indexes_guard:
+            _indexes[name] = (sig, size, vec)
+            _indexes.move_to_end(name)
+        print(f"✅ FAISS loaded: {name}")
+
+    _evict(keep=name)
+    return vec
+
+
+def warm(embedding, names=None) -> None:
+    """
+    Load `names` (default: every *_faiss directory) ahead of the first request.
+    Stops early once the memory budget is full so warming never evicts.
+    """
+    for name in names or available():
+        if MEMORY_BUDGET and _resident_bytes() >= MEMORY_BUDGET:
+            print(f"⏭️ FAISS memory budget reached, {name} will load on demand")
+            break
+        try:
+            get_vector(name, embedding)
+        except Exception as e:
+            print(f"❌ Failed to preload FAISS index {name}: {e}")
+
+
+def version(name: str):
+    """Current on-disk signature of an index; changes whenever it is rebuilt."""
+    return _signature(_index_path(name))
+
+
+def loaded() -> list[str]:
+    """Resident indexes, least-recently-used first."""
+    return list(_indexes)
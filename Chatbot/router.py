@@ -0,0 +1,171 @@
+"""
+Chatbot/router.py
+Local project detection for realestatebot – which catalog projects a message
+is about, without an LLM round-trip in the common case.
+
+1. Alias match: every project's name and its catalog "aliases" are indexed as
+   token n-grams; the message's n-grams are looked up in that table, so cost
+   grows with the message, not the number of aliases.
+2. Fuzzy match: message words of 4+ letters are compared (difflib ratio) with
+   alias words of the same n-gram length. A ratio of ROUTER_FUZZY_MIN or more
+   counts as a hit – one typo in a name: "krupel", "krupaal", "ramvaan".
+   A ratio within ROUTER_FUZZY_NEAR below it makes the result ambiguous, but
+   only if the word keeps the alias's first four letters ("krupeel"); other
+   near misses are different words ("ramadan" vs "ramvan") and match nothing.
+3. Centroid check (ROUTER_CENTROIDS=1, FAISS projects only): with no name in
+   the message, the query embedding is compared with the mean vector of each
+   project's index. A clear winner (ROUTER_CENTROID_MIN similarity, ahead of
+   the runner-up by ROUTER_CENTROID_MARGIN) is taken; a close race is ambiguous.
+4. Only ambiguous messages go to the LLM (`llm_fallback`).
+
+A message that names nothing and matches no centroid routes to no project, as
+the LLM's "None" did.
+"""
+
+import difflib
+import os
+import re
+import threading
+
+import numpy as np
+
+try:
+    from Chatbot import catalog, registry
+except ImportError:  # run from inside Chatbot/
+    import catalog
+    import registry
+
+FUZZY_MIN = float(os.getenv("ROUTER_FUZZY_MIN", "0.8"))
+FUZZY_NEAR = float(os.getenv("ROUTER_FUZZY_NEAR", "0.05"))
+USE_CENTROIDS = os.getenv("ROUTER_CENTROIDS", "0") == "1"
+CENTROID_MIN = float(os.getenv("ROUTER_CENTROID_MIN", "0.80"))
+CENTROID_MARGIN = float(os.getenv("ROUTER_CENTROID_MARGIN", "0.03"))
+
+_tables = {}      # section -> (catalog object, {alias n-gram tuple: project}, max n)
+_centroids = {}   # index name -> (registry version, unit centroid)
+_lock = threading.Lock()
+_stats = {"alias": 0, "fuzzy": 0, "centroid": 0, "llm": 0, "none": 0}
+
+
+def _tokens(text: str) -> list[str]:
+    return re.sub(r"[^a-z0-9]+", " ", text.lower()).split()
+
+
+def _table(section: str):
+    cat = catalog.load()
+    with _lock:
+        cached = _tables.get(section)
+        if cached is not None and cached[0] is cat:   # rebuilt after catalog.reload()
+            return cached[1], cached[2]
+        table = {}
+        for name, spec in cat.get(section, {}).items():
+            for alias in [name, *spec.get("aliases", [])]:
+                gram = tuple(_tokens(alias))
+                if gram:
+                    table[gram] = name
+        longest = max((len(g) for g in table), default=1)
+        _tables[section] = (cat, table, longest)
+        return table, longest
+
+
+def _grams(tokens: list[str], n: int):
+    return (tuple(tokens[i:i + n]) for i in range(len(tokens) - n + 1))
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+def _match_aliases(tokens, table, longest):
+    """Exact alias hits, then fuzzy ones: (found projects, ambiguous?)."""
+    found = []
+    for n in range(longest, 0, -1):
+        for gram in _grams(tokens, n):
+            project = table.get(gram)
+            if project and project not in found:
+                found.append(project)
+    if found:
+        return found, "alias", False
+
+    best = {}   # project -> best ratio
+    near = False
+    for gram_len in {len(g) for g in table}:
+        for gram in _grams(tokens, gram_len):
+            if sum(len(t) for t in gram) < 4 * gram_len:
+                continue
+            text = " ".join(gram)
+            for alias, project in table.items():
+                if len(alias) != gram_len:
+                    continue
+                alias_text = " ".join(alias)
+                ratio = difflib.SequenceMatcher(None, text, alias_text).ratio()
+                best[project] = max(best.get(project, 0.0), ratio)
+                if FUZZY_MIN - FUZZY_NEAR <= ratio < FUZZY_MIN and text[:4] == alias_text[:4]:
+                    near = True
+    hits = [p for p, r in sorted(best.items(), key=lambda kv: -kv[1]) if r >= FUZZY_MIN]
+    return hits, "fuzzy", near and not hits
+
+
+def _centroid(index: str, embedding):
+    version = registry.version(index)
+    with _lock:
+        cached = _centroids.get(index)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    faiss_index = registry.get_vector(index, embedding).index
+    mean = faiss_index.reconstruct_n(0, faiss_index.ntotal).mean(axis=0)
+    unit = mean / (np.linalg.norm(mean) or 1.0)
+    with _lock:
+        _centroids[index] = (version, unit)
+    return unit
+
+
+def _match_centroids(query_vec, section: str, embedding):
+    """(project or None, ambiguous?) from the nearest index centroid."""
+    q = np.asarray(query_vec, dtype=np.float32)
+    q = q / (np.linalg.norm(q) or 1.0)
+    scored = []
+    for name, spec in catalog.load().get(section, {}).items():
+        if spec.get("backend", "faiss") != "faiss" or not spec.get("index"):
+            continue
+        try:
+            scored.append((float(q @ _centroid(spec["index"], embedding)), name))
+        except Exception as e:   # index missing / not reconstructable
+            print(f"[WARN] router: no centroid for {name}: {e}")
+    if not scored:
+        return None, False
+    scored.sort(reverse=True)
+    top, name = scored[0]
+    if top < CENTROID_MIN:
+        return None, False
+    runner_up = scored[1][0] if len(scored) > 1 else -1.0
+    if top - runner_up < CENTROID_MARGIN:
+        return None, True
+    return name, False
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+def route(query: str, section: str = "general_bot", embedding=None, llm_fallback=None) -> list[str]:
+    """
+    Catalog projects (keys of `section`) the query is about, most likely first.
+    `embedding` enables the centroid check (with ROUTER_CENTROIDS=1);
+    `llm_fallback(query)` returns comma-separated names or "none" and is only
+    called when the local checks are ambiguous.
+    """
+    table, longest = _table(section)
+    found, method, ambiguous = _match_aliases(_tokens(query), table, longest)
+
+    if not found and not ambiguous and USE_CENTROIDS and embedding is not None:
+        project, ambiguous = _match_centroids(embedding.embed_query(query), section, embedding)
+        if project:
+            found, method = [project], "centroid"
+
+    if not found and ambiguous and llm_fallback is not None:
+        answer = llm_fallback(query)
+        known = catalog.names(section)
+        found = [n.strip().lower() for n in answer.split(",") if n.strip().lower() in known]
+        method = "llm"
+
+    _stats[method if found else "none"] += 1
+    return found
+
+
+def stats() -> dict:
+    return dict(_stats)
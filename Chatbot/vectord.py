@@ -1,29 +1,16 @@
-# Step 1: Read text from DOCX
+# Builds / updates a FAISS index from a folder of project documents.
+# Kept for the old workflow; the work is done by ingest.py, which only
+# re-embeds new or changed chunks (see its docstring).
+#
+#   python Chatbot/vectord.py <docs dir> [index dir, default riverside_faiss]
 import os
-from langchain_community.document_loaders import UnstructuredFileLoader
-from langchain_community.vectorstores import FAISS
-from langchain_openai import OpenAIEmbeddings
-from langchain_text_splitters import RecursiveCharacterTextSplitter
+import sys
 
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from Chatbot.ingest import main
 
-from dotenv import load_dotenv
-
-load_dotenv()
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-
-# === Load DOCX file ===
-loader = UnstructuredFileLoader(r"C:\Users\vaibh\Downloads\Riverside.docx")
-raw_docs = loader.load()
-
-# === Split documents ===
-text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=100)
-docs = text_splitter.split_documents(raw_docs)
-
-# === Create embeddings and FAISS index ===
-embedding = OpenAIEmbeddings()
-vector_db = FAISS.from_documents(docs, embedding)
-
-# === Save the FAISS vectorstore ===
-vector_db.save_local("riverside_faiss")
-
-print("✅ FAISS vector DB created and saved as 'riverside_faiss_db'")
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if len(args) == 1:
+        args.append("riverside_faiss")
+    main(args)
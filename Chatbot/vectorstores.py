@@ -0,0 +1,174 @@
+"""
+Chatbot/vectorstores.py
+One retrieval interface for the bots, whichever backend holds a project's chunks.
+
+A project's catalog entry (projects.json) picks the backend:
+
+  "index": "ramvan_faiss"                          – FAISS, in-process (default),
+                                                     loaded through registry.py
+  "backend": "qdrant", "collection": "ramvan"      – remote Qdrant collection,
+                                                     via utils/qdrant_client.py
+
+and may add a metadata "filter", e.g. {"project": "ramvan"} to share one
+collection between projects. "hybrid": true (FAISS only) also runs a BM25
+search over the index's bm25.json (lexical.py) and fuses both rankings.
+
+Both backends return langchain Documents in the same shape:
+  page_content        – the chunk text (Qdrant payload "text")
+  metadata            – every other payload / metadata field, plus "score"
+  id                  – docstore id / point id
+Scores are similarities, higher is better: FAISS squared-L2 distances over
+the (unit-length) OpenAI embeddings are turned into cosine, 1 - d/2, which is
+what a cosine Qdrant collection reports (hybrid results carry the dense or
+BM25 score of the side that found them). Filters are {field: value} or
+{field: [any, of, these]}. `query_text` is only used by hybrid stores.
+
+Qdrant collections must hold vectors from the same embedding model as the bot.
+"""
+
+import asyncio
+import os
+import threading
+import time
+
+from langchain_core.documents import Document
+
+try:
+    from Chatbot import catalog, fusion, lexical, registry
+except ImportError:  # run from inside Chatbot/
+    import catalog
+    import fusion
+    import lexical
+    import registry
+
+VERSION_TTL = int(os.getenv("QDRANT_VERSION_TTL", "60"))   # seconds between version checks
+HYBRID_FETCH = int(os.getenv("HYBRID_FETCH", "3"))          # candidates per side = k * this
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+class FaissStore:
+    backend = "faiss"
+
+    def __init__(self, index: str, embedding):
+        self.index = index
+        self.embedding = embedding
+
+    def _vector(self):
+        return registry.get_vector(self.index, self.embedding)
+
+    @staticmethod
+    def _docs(pairs) -> list[Document]:
+        # fresh Documents: the docstore's own objects are shared between requests
+        return [
+            Document(page_content=d.page_content,
+                     metadata=dict(d.metadata, score=1.0 - float(dist) / 2.0),
+                     id=getattr(d, "id", None))
+            for d, dist in pairs
+        ]
+
+    def search(self, query_vec, k: int, filter: dict = None, query_text: str = None) -> list[Document]:
+        return self._docs(
+            self._vector().similarity_search_with_score_by_vector(query_vec, k=k, filter=filter)
+        )
+
+    async def asearch(self, query_vec, k: int, filter: dict = None,
+                      query_text: str = None) -> list[Document]:
+        vector = await asyncio.to_thread(self._vector)   # may hit disk on first use
+        pairs = await vector.asimilarity_search_with_score_by_vector(query_vec, k=k, filter=filter)
+        return self._docs(pairs)
+
+    def version(self):
+        return registry.version(self.index)
+
+
+class HybridStore(FaissStore):
+    """FAISS + BM25: both sides fetch k * HYBRID_FETCH candidates, RRF keeps k."""
+    backend = "hybrid"
+
+    def _fuse(self, dense, query_text, k, filter):
+        if not query_text:
+            return dense[:k]
+        path = registry._index_path(self.index)
+        sparse = lexical.search(path, query_text, k * HYBRID_FETCH, filter)
+        return fusion.fuse([dense, sparse], k)
+
+    def search(self, query_vec, k: int, filter: dict = None, query_text: str = None) -> list[Document]:
+        dense = super().search(query_vec, k * HYBRID_FETCH, filter)
+        return self._fuse(dense, query_text, k, filter)
+
+    async def asearch(self, query_vec, k: int, filter: dict = None,
+                      query_text: str = None) -> list[Document]:
+        dense = await super().asearch(query_vec, k * HYBRID_FETCH, filter)
+        return self._fuse(dense, query_text, k, filter)
+
+
+class QdrantStore:
+    backend = "qdrant"
+
+    _versions = {}   # collection -> (checked_at, content version stamp)
+    _versions_lock = threading.Lock()
+
+    def __init__(self, collection: str):
+        self.collection = collection
+
+    @staticmethod
+    def _filter(filter: dict):
+        if not filter:
+            return None
+        return {"must": [
+            {"key": key, "match": {"any": value} if isinstance(value, list) else {"value": value}}
+            for key, value in filter.items()
+        ]}
+
+    @staticmethod
+    def _docs(hits) -> list[Document]:
+        docs = []
+        for h in hits:
+            metadata = {key: v for key, v in h["payload"].items() if key != "text"}
+            metadata["score"] = h["score"]
+            docs.append(Document(page_content=h["text"], metadata=metadata, id=str(h["id"])))
+        return docs
+
+    def search(self, query_vec, k: int, filter: dict = None, query_text: str = None) -> list[Document]:
+        from utils.qdrant_client import query_qdrant
+        return self._docs(query_qdrant(list(query_vec), k, self.collection, self._filter(filter)))
+
+    async def asearch(self, query_vec, k: int, filter: dict = None,
+                      query_text: str = None) -> list[Document]:
+        return await asyncio.to_thread(self.search, query_vec, k, filter)
+
+    def version(self):
+        """
+        The content version upload_to_qdrant stamps into the collection metadata
+        (checked at most every VERSION_TTL seconds). None – don't cache answers –
+        if the collection was never stamped or the lookup failed.
+        """
+        from utils.qdrant_client import content_version
+        now = time.monotonic()
+        with self._versions_lock:
+            cached = self._versions.get(self.collection)
+        if cached is None or now - cached[0] > VERSION_TTL:
+            stamp = content_version(self.collection)
+            if stamp is None:
+                return None   # not remembered: the next call asks again
+            cached = (now, stamp)
+            with self._versions_lock:
+                self._versions[self.collection] = cached
+        return (self.collection, cached[1])
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+def for_spec(spec: dict, embedding):
+    backend = spec.get("backend", "faiss")
+    if backend == "faiss":
+        if spec.get("hybrid"):
+            return HybridStore(spec["index"], embedding)
+        return FaissStore(spec["index"], embedding)
+    if backend == "qdrant":
+        return QdrantStore(spec["collection"])
+    raise ValueError(f"Unknown vector store backend: {backend}")
+
+
+def for_project(name: str, embedding, section: str = "projects"):
+    """Vector store of a catalog project (raises ValueError for unknown projects)."""
+    return for_spec(catalog.project(name, section), embedding)
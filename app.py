@@ -1,25 +1,24 @@
 # app.py
 from flask import Flask
 from flask_cors import CORS
-from database import db
+from database import configure_db, db
+from models import AIMessage
 from routes.customer_routes import customer_bp
 from routes.ai_message_route import ai_bp
+from Chatbot.bot import warm_projects
 from flask import request, jsonify
-from livekit.api import AccessToken,VideoGrants
 import os
 import datetime
 from dotenv import load_dotenv
 load_dotenv()
 app = Flask(__name__)
-app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///customers.db"
-app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
 
 # 💡 CORS for everything coming from the React dev server
 from flask_cors import CORS
 
 CORS(app, origins="*", methods=["GET", "POST", "OPTIONS"], allow_headers=["Content-Type"])
 
-db.init_app(app)
+configure_db(app)   # DATABASE_URL / pool / SQLite WAL settings, see database.py
 
 # Blueprints
 app.register_blueprint(customer_bp, url_prefix="/customers")
@@ -27,6 +26,8 @@ app.register_blueprint(ai_bp, url_prefix="/ai")
 
 @app.route("/api/get-livekit-token", methods=["POST"])
 def get_livekit_token():
+    from livekit.api import AccessToken, VideoGrants   # not needed for anything else
+
     try:
         data = request.get_json()
         identity = data["identity"]
@@ -54,6 +55,13 @@ def get_livekit_token():
 
 with app.app_context():
     db.create_all()
+    # create_all() skips indexes on tables that already exist
+    for index in AIMessage.__table__.indexes:
+        index.create(db.engine, checkfirst=True)
+
+# load every FAISS index once per process, before the first /ai/new_query
+if os.getenv("PRELOAD_FAISS", "1") == "1":
+    warm_projects()
 
 if __name__ == "__main__":
     # use a fixed port so the frontend URL stays http://localhost:5000
@@ -0,0 +1,134 @@
+# asgi.py
+"""
+Async serving mode for the chat API.
+
+    uvicorn asgi:app --host 0.0.0.0 --port 5000 --workers 2
+
+POST /ai/new_query is handled natively async: history reads / message writes
+go through an async SQLAlchemy engine (aiosqlite / asyncpg) and the embedding,
+FAISS search and OpenAI call are awaited (bot.agenerate_response), so a chat
+waiting on upstream I/O doesn't pin a worker thread. Every other route falls
+through to the Flask app.
+
+No throughput numbers are recorded for this mode yet; measure it against the
+sync server with benchmarks/load_test_chat.py on the deployment before relying
+on it.
+
+History goes through the same chat_history window as the Flask routes (queued
+write-behind rows included), and with MESSAGE_WRITE_BEHIND=1 turns are queued
+on the shared message_writer instead of inserted here.
+"""
+import datetime
+
+from a2wsgi import WSGIMiddleware
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import create_async_engine
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Mount, Route
+
+import chat_history
+import message_writer
+from app import app as flask_app
+from database import db, engine_options
+from models import AIMessage
+from Chatbot.bot import agenerate_response
+
+_ASYNC_DRIVERS = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+asyncpg"}
+# same policy as flask_cors in app.py (the Flask app only covers its own routes)
+_CORS = {
+    "Access-Control-Allow-Origin": "*",
+    "Access-Control-Allow-Methods": "GET, POST, OPTIONS",
+    "Access-Control-Allow-Headers": "Content-Type",
+}
+
+
+def _async_url():
+    # reuse the Flask-SQLAlchemy URL (already resolved to the instance folder)
+    with flask_app.app_context():
+        url = db.engine.url
+    return url.set(drivername=_ASYNC_DRIVERS.get(url.get_backend_name(), url.drivername))
+
+
+_url = _async_url()
+engine = create_async_engine(_url, **engine_options(_url.render_as_string(hide_password=False)))
+messages = AIMessage.__table__
+
+
+def _row_dict(row_id, user_id, session_id, role, message, ts):
+    return {
+        "id": row_id,
+        "user_id": user_id,
+        "session_id": session_id,
+        "role": role,
+        "message": message,
+        "timestamp": ts.isoformat(),
+    }
+
+
+async def _insert_turn(user_id, session_id, user_msg, ai_text, user_ts, ai_ts):
+    async with engine.begin() as conn:
+        user_id_pk = (await conn.execute(insert(messages).values(
+            user_id=user_id, session_id=session_id, role="user",
+            message=user_msg, timestamp=user_ts,
+        ))).inserted_primary_key[0]
+        ai_id_pk = (await conn.execute(insert(messages).values(
+            user_id=user_id, session_id=session_id, role="ai",
+            message=ai_text, timestamp=ai_ts,
+        ))).inserted_primary_key[0]
+    user = _row_dict(user_id_pk, user_id, session_id, "user", user_msg, user_ts)
+    ai = _row_dict(ai_id_pk, user_id, session_id, "ai", ai_text, ai_ts)
+    chat_history.record(user_id, session_id, "user", user_msg, user)
+    chat_history.record(user_id, session_id, "ai", ai_text, ai)
+    return user, ai
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+async def new_query(request):
+    if request.method == "OPTIONS":
+        return JSONResponse(None, headers=_CORS)
+    try:
+        data = await request.json()
+    except ValueError:
+        data = {}
+
+    user_id      = data.get("user_id")
+    session_id   = data.get("session_id")
+    project_name = data.get("project_name", "Krupal Habitat")  # default
+    user_msg     = (data.get("message") or "").strip()
+
+    if not all([user_id, session_id, user_msg]):
+        return JSONResponse({"error": "user_id, session_id, message required"}, 400,
+                            headers=_CORS)
+
+    # rolling window: one query for rows other processes wrote since our last
+    # turn; only a cold or stale session reads the last 19 rows
+    async with engine.connect() as conn:
+        stmt = chat_history.newer_query(user_id, session_id)
+        if stmt is None or not chat_history.check(user_id, session_id,
+                                                  (await conn.execute(stmt)).all()):
+            rows = (await conn.execute(chat_history.seed_query(user_id, session_id))).all()
+            chat_history.seed_rows(user_id, session_id, rows)
+    history = chat_history.history_for(user_id, session_id, user_msg, refreshed=True)
+
+    # LLM
+    user_ts = datetime.datetime.utcnow()
+    bot = await agenerate_response(project_name, history, False)
+    ai_ts = datetime.datetime.utcnow()
+
+    if message_writer.ENABLED:
+        # same queue as the Flask routes, so both see each other's pending rows;
+        # save_turn only enqueues (and records the window) – no I/O on the loop
+        with flask_app.app_context():
+            user, ai = message_writer.save_turn(user_id, session_id, user_msg, bot["text"])
+    else:
+        user, ai = await _insert_turn(user_id, session_id, user_msg, bot["text"],
+                                      user_ts, ai_ts)
+
+    return JSONResponse(dict(user=user, ai=ai, image_url=bot["image_url"]), headers=_CORS)
+
+
+app = Starlette(routes=[
+    Route("/ai/new_query", new_query, methods=["POST", "OPTIONS"]),
+    Mount("/", app=WSGIMiddleware(flask_app)),
+])
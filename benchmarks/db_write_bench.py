@@ -0,0 +1,88 @@
+"""
+benchmarks/db_write_bench.py
+Parallel chat-write benchmark for the configured database.
+
+Each worker process behaves like a chat or voice session: per turn it adds a
+user row and an AI row to ai_message and commits, with a history read in
+between. Reports turns/s and how many commits failed with lock errors.
+Rows are left behind, so point DATABASE_URL at a scratch database.
+
+    SQLITE_WAL=0 python benchmarks/db_write_bench.py -p 8 -n 200   # rollback journal
+    SQLITE_WAL=1 python benchmarks/db_write_bench.py -p 8 -n 200   # WAL mode
+    DATABASE_URL=postgresql://... python benchmarks/db_write_bench.py -p 8 -n 200
+"""
+
+import argparse
+import os
+import sys
+import time
+import uuid
+from multiprocessing import Pool
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(ROOT)
+
+from flask import Flask
+from sqlalchemy.exc import OperationalError
+
+from database import configure_db, db
+from models import AIMessage
+
+
+def _make_app():
+    # same instance folder as app.py, so sqlite:///customers.db is the same file
+    app = Flask(__name__, instance_path=os.path.join(ROOT, "instance"))
+    configure_db(app)
+    return app
+
+
+def _worker(args):
+    n_turns, worker_id = args
+    app = _make_app()
+    session_id = str(uuid.uuid4())
+    ok = locked = 0
+    with app.app_context():
+        for i in range(n_turns):
+            try:
+                db.session.add(AIMessage(user_id=f"bench-{worker_id}", session_id=session_id,
+                                         role="user", message=f"question {i}"))
+                (AIMessage.query.filter_by(user_id=f"bench-{worker_id}", session_id=session_id)
+                 .order_by(AIMessage.timestamp.desc()).limit(19).all())
+                db.session.add(AIMessage(user_id=f"bench-{worker_id}", session_id=session_id,
+                                         role="ai", message=f"answer {i}"))
+                db.session.commit()
+                ok += 1
+            except OperationalError as e:
+                db.session.rollback()
+                if "locked" in str(e).lower():
+                    locked += 1
+                else:
+                    raise
+    return ok, locked
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("-p", "--processes", type=int, default=8)
+    ap.add_argument("-n", "--turns", type=int, default=200, help="turns per process")
+    args = ap.parse_args()
+
+    with _make_app().app_context():
+        db.create_all()
+        print(f"database: {db.engine.url}")
+
+    started = time.perf_counter()
+    with Pool(args.processes) as pool:
+        results = pool.map(_worker, [(args.turns, i) for i in range(args.processes)])
+    wall = time.perf_counter() - started
+
+    ok = sum(r[0] for r in results)
+    locked = sum(r[1] for r in results)
+    total = ok + locked
+    print(f"processes={args.processes} turns/process={args.turns} wall={wall:.2f}s")
+    print(f"committed turns: {ok} ({ok / wall:.1f}/s)   lock errors: {locked} "
+          f"({100 * locked / total if total else 0:.1f}%)")
+
+
+if __name__ == "__main__":
+    main()
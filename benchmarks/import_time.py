@@ -0,0 +1,127 @@
+"""
+benchmarks/import_time.py
+Import-time report for the process entry points, checked against a budget.
+
+Each entry point is imported in a fresh interpreter under `python -X importtime`
+(with PRELOAD_FAISS=0, so only the import is measured, not index warm-up).
+The report shows the total and the slowest modules; entries over their budget
+in benchmarks/import_budget.json make the script exit 1, so it can gate CI or
+a deploy; entry points without a budget are only reported.
+
+The committed budget was measured with --write-budget --runs 5 on a single-core
+Linux container with Python 3.11 (web 1280 ms, asgi 1305, celery 235,
+sheets_task 503, voice_task 180, bot 533, +25% headroom). voice_bot has no
+entry, because livekit was not installed there. Numbers from another machine
+are not comparable: re-baseline on the image you deploy and commit the result.
+
+    python benchmarks/import_time.py                  # report + budget check
+    python benchmarks/import_time.py --top 25         # longer slowest-module list
+    python benchmarks/import_time.py --runs 5         # median of 5 runs
+    python benchmarks/import_time.py --write-budget   # re-baseline (+25% headroom)
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+BUDGET_PATH = os.path.join(ROOT, "benchmarks", "import_budget.json")
+
+# what each kind of process imports when it starts
+ENTRY_POINTS = {
+    "web": "app",
+    "asgi": "asgi",
+    "celery": "celery_app",
+    "sheets_task": "tasks.sheets_tasks",
+    "voice_task": "tasks.voice_tasks",
+    "voice_bot": "voice_agent.voice_bot",
+    "bot": "Chatbot.bot",
+}
+
+# "import time:       123 |       4567 |   package.module"
+_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def measure(module: str):
+    """(total ms, [(cumulative ms, self ms, module), ...] for the modules it imports)."""
+    env = dict(os.environ, PRELOAD_FAISS="0", PYTHONDONTWRITEBYTECODE="1")
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, env=env, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        tail = proc.stderr.strip().splitlines()[-1:] or ["?"]
+        raise RuntimeError(f"import {module} failed: {tail[0]}")
+
+    rows = []
+    for line in proc.stderr.splitlines():
+        m = _LINE.match(line)
+        if m:
+            self_us, cum_us, indent, name = int(m[1]), int(m[2]), len(m[3]), m[4]
+            rows.append((cum_us / 1000, self_us / 1000, name, (indent - 1) // 2))
+
+    # children are listed (indented one level deeper) right before their parent;
+    # keep the direct imports of the entry point, skip interpreter start-up (site, ...)
+    total, children = 0.0, []
+    for i, (cum, own, name, depth) in enumerate(rows):
+        if depth == 0 and name == module:
+            total = cum
+            for c_cum, c_own, c_name, c_depth in reversed(rows[:i]):
+                if c_depth == 0:
+                    break
+                if c_depth == 1:
+                    children.append((c_cum, c_own, c_name))
+    return total, sorted(children, reverse=True)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("entry", nargs="*", help=f"entry points (default: all of {', '.join(ENTRY_POINTS)})")
+    ap.add_argument("--runs", type=int, default=3)
+    ap.add_argument("--top", type=int, default=10)
+    ap.add_argument("--write-budget", action="store_true")
+    args = ap.parse_args()
+
+    try:
+        with open(BUDGET_PATH, encoding="utf-8") as f:
+            budget = json.load(f)
+    except OSError:
+        budget = {}
+
+    over = []
+    for name in args.entry or ENTRY_POINTS:
+        module = ENTRY_POINTS.get(name, name)
+        try:
+            runs = [measure(module) for _ in range(max(1, args.runs))]
+        except RuntimeError as e:
+            print(f"\n{name}: ❌ {e}")
+            over.append(name)
+            continue
+        total = statistics.median(t for t, _ in runs)
+        limit = budget.get(name)
+        status = "" if limit is None else ("✅" if total <= limit else "❌ over budget")
+        print(f"\n{name} ({module}): {total:.0f} ms"
+              + (f"  budget {limit} ms {status}" if limit is not None else ""))
+        for cum, own, mod in runs[-1][1][:args.top]:
+            print(f"  {cum:8.1f} ms  (self {own:6.1f})  {mod}")
+        if limit is not None and total > limit:
+            over.append(name)
+        if args.write_budget:
+            budget[name] = int(total * 1.25) + 1
+
+    if args.write_budget:
+        with open(BUDGET_PATH, "w", encoding="utf-8") as f:
+            json.dump(budget, f, indent=2)
+            f.write("\n")
+        print(f"\nBudget written to {BUDGET_PATH}")
+    elif over:
+        print(f"\nFailed or over budget: {', '.join(over)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+benchmarks/load_test_chat.py
+Concurrent load test for POST /ai/new_query.
+
+Run it once against the sync Flask server and once against the ASGI one,
+with the same concurrency, and compare throughput / latency:
+
+    python app.py                                   # sync, port 5000
+    uvicorn asgi:app --port 5001                    # async
+
+    python benchmarks/load_test_chat.py --url http://localhost:5000 -c 50 -n 200
+    python benchmarks/load_test_chat.py --url http://localhost:5001 -c 50 -n 200
+
+Every request uses its own session id so requests don't share history.
+"""
+
+import argparse
+import statistics
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+QUESTIONS = ["price?", "location", "payment plan", "what amenities are there?",
+             "is it a good investment?"]
+
+
+def _one(url, project, i):
+    payload = {
+        "user_id": "loadtest",
+        "session_id": str(uuid.uuid4()),
+        "project_name": project,
+        "message": QUESTIONS[i % len(QUESTIONS)],
+    }
+    started = time.perf_counter()
+    try:
+        ok = requests.post(f"{url}/ai/new_query", json=payload, timeout=120).status_code == 200
+    except requests.RequestException:
+        ok = False
+    return ok, time.perf_counter() - started
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--url", default="http://localhost:5000")
+    ap.add_argument("--project", default="Krupal Habitat")
+    ap.add_argument("-c", "--concurrency", type=int, default=20)
+    ap.add_argument("-n", "--requests", type=int, default=100)
+    args = ap.parse_args()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        results = list(pool.map(lambda i: _one(args.url, args.project, i), range(args.requests)))
+    wall = time.perf_counter() - started
+
+    latencies = sorted(t for ok, t in results if ok)
+    errors = sum(1 for ok, _ in results if not ok)
+    print(f"url={args.url} concurrency={args.concurrency} requests={args.requests}")
+    print(f"throughput: {len(latencies) / wall:.2f} req/s   errors: {errors}")
+    if latencies:
+        p95 = latencies[int(0.95 * (len(latencies) - 1))]
+        print(f"latency: p50={statistics.median(latencies):.2f}s  p95={p95:.2f}s  "
+              f"max={latencies[-1]:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
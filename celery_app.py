@@ -1,12 +1,24 @@
 # celery_app.py
+import os
 from celery import Celery
 
 def make_celery(app_name=__name__):
     return Celery(
         app_name,
         backend="redis://localhost:6379/0",
-        broker="redis://localhost:6379/0"
+        broker="redis://localhost:6379/0",
+        # imported by the worker at startup; web processes import only the
+        # task module they send to
+        include=["tasks.voice_tasks", "tasks.sheets_tasks"],
     )
 
 celery = make_celery()
-import tasks.voice_tasks
\ No newline at end of file
+
+# periodic drain of the Google Sheets lead outbox – retries backed-off rows and
+# anything whose post-signup kick was lost (run `celery -A celery_app beat`)
+celery.conf.beat_schedule = {
+    "sync-leads": {
+        "task": "tasks.sheets_tasks.sync_leads",
+        "schedule": float(os.getenv("LEAD_SYNC_INTERVAL", "60")),
+    },
+}
@@ -0,0 +1,255 @@
+# chat_history.py
+"""
+Per-session conversation history for the chat and voice bots.
+
+Instead of re-reading the last 19 ai_message rows on every turn, each
+(user_id, session_id) keeps a rolling window in process memory:
+
+- seeded from the DB the first time a session is seen (or after HISTORY_TTL
+  seconds idle)
+- appended to after every turn via record()
+- checked before every turn: one indexed query for rows past the highest id /
+  timestamp the window has seen. The web workers and the voice process share
+  sessions, so if any of those rows was not written through this process the
+  window is reloaded from the DB
+- trimmed by token count (HISTORY_MAX_TOKENS) rather than row count
+- with HISTORY_SUMMARY=1, turns that fall out of the window are folded into a
+  running summary (in a background thread) that is sent as a system message
+"""
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+
+from sqlalchemy import func, or_, select
+
+MAX_TOKENS = int(os.getenv("HISTORY_MAX_TOKENS", "3000"))
+SEED_ROWS = 19          # rows read from the DB for a cold session
+MAX_TURNS = 50          # hard cap per session, whatever the token count
+TTL = int(os.getenv("HISTORY_TTL", "900"))
+MAX_SESSIONS = int(os.getenv("HISTORY_MAX_SESSIONS", "5000"))
+SUMMARY = os.getenv("HISTORY_SUMMARY", "0") == "1"
+
+# (user_id, session_id) -> {"turns", "summary", "expires_at",
+#                           "head": (max timestamp, max id) seen in the DB,
+#                           "own": ids / ISO timestamps of rows this process wrote}
+_sessions = OrderedDict()
+_lock = threading.Lock()
+
+_enc = None               # tiktoken encoder, or False once it failed to load
+_enc_lock = threading.Lock()
+
+
+def _encoder():
+    # loaded on first use: get_encoding() may download the BPE file, which must
+    # not block (or, offline, crash) the import of every web / voice process
+    global _enc
+    if _enc is None:
+        with _enc_lock:
+            if _enc is None:
+                try:
+                    import tiktoken
+                    _enc = tiktoken.get_encoding("o200k_base")
+                except Exception as e:
+                    print(f"[WARN] tiktoken unavailable, estimating tokens from length: {e}")
+                    _enc = False
+    return _enc
+
+
+def count_tokens(text: str) -> int:
+    enc = _encoder()
+    if enc:
+        return len(enc.encode(text))
+    return len(text) // 4 + 1   # rough fallback: ~4 chars per token
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+def _table():
+    from models import AIMessage
+    return AIMessage.__table__
+
+
+def seed_query(user_id, session_id):
+    """The last SEED_ROWS rows of a session, newest first (feed to seed_rows())."""
+    t = _table()
+    # the maxima run over the whole session, not just the rows returned: a
+    # write-behind row can be older by timestamp but newer by id
+    return (
+        select(t.c.id, t.c.role, t.c.message, t.c.timestamp,
+               func.max(t.c.id).over().label("max_id"),
+               func.max(t.c.timestamp).over().label("max_ts"))
+        .where(t.c.user_id == user_id, t.c.session_id == session_id)
+        .order_by(t.c.timestamp.desc(), t.c.id.desc())
+        .limit(SEED_ROWS)
+    )
+
+
+def newer_query(user_id, session_id):
+    """Rows written after the cached window's newest one (feed to check()); None if cold."""
+    with _lock:
+        s = _sessions.get((user_id, session_id))
+        if s is None or s["expires_at"] < time.time():
+            return None
+        head = s["head"]
+    t = _table()
+    q = select(t.c.id, t.c.timestamp).where(t.c.user_id == user_id, t.c.session_id == session_id)
+    if head is not None:
+        # ids catch new rows whatever their timestamp (SQLite's CURRENT_TIMESTAMP
+        # has no fraction, so equal-second rows don't compare as newer); the
+        # timestamp catches a row committed after one with a higher id
+        ts, row_id = head
+        q = q.where(or_(t.c.id > row_id, t.c.timestamp > ts))
+    return q.order_by(t.c.id).limit(MAX_TURNS + 1)
+
+
+def _is_own(own: set, row) -> bool:
+    return row.id in own or row.timestamp.isoformat() in own
+
+
+def check(user_id, session_id, newer_rows) -> bool:
+    """
+    True if the cached window is still complete: every row in `newer_rows`
+    (newer_query() results) was recorded here. Otherwise the window is dropped
+    and the caller re-seeds it.
+    """
+    with _lock:
+        s = _sessions.get((user_id, session_id))
+        if s is None:
+            return False
+        if len(newer_rows) > MAX_TURNS or not all(_is_own(s["own"], r) for r in newer_rows):
+            s["expires_at"] = 0.0     # the summary survives the re-seed
+            return False
+        for r in newer_rows:
+            s["own"].discard(r.id)
+            s["own"].discard(r.timestamp.isoformat())
+            ts, row_id = s["head"] or (r.timestamp, r.id)
+            s["head"] = (max(ts, r.timestamp), max(row_id, r.id))
+        return True
+
+
+def seed_rows(user_id, session_id, rows) -> None:
+    """Seed a session from seed_query() results plus the rows still queued by
+    the write-behind writer (MESSAGE_WRITE_BEHIND=1)."""
+    import message_writer
+
+    queued = message_writer.pending(user_id, session_id)
+    turns = [{"role": r.role, "content": r.message} for r in rows[::-1]]
+    turns += [{"role": r["role"], "content": r["message"]} for r in queued]
+    head = (rows[0].max_ts, rows[0].max_id) if rows else None
+    seed(user_id, session_id, turns[-SEED_ROWS:], head, {r["timestamp"] for r in queued})
+
+
+def refresh(user_id, session_id) -> None:
+    """Check the cached window against the DB, re-seeding it if cold or stale (needs an app context)."""
+    from database import db
+
+    with db.session.no_autoflush:   # don't pick up a pending, uncommitted row
+        stmt = newer_query(user_id, session_id)
+        if stmt is not None and check(user_id, session_id, db.session.execute(stmt).all()):
+            return
+        seed_rows(user_id, session_id, db.session.execute(seed_query(user_id, session_id)).all())
+
+
+def peek(user_id, session_id):
+    """Cached turns for a session, or None if it is cold / expired."""
+    with _lock:
+        s = _sessions.get((user_id, session_id))
+        if s is None or s["expires_at"] < time.time():
+            return None
+        _sessions.move_to_end((user_id, session_id))
+        return list(s["turns"])
+
+
+def seed(user_id, session_id, turns: list[dict], head=None, own=()) -> None:
+    key = (user_id, session_id)
+    with _lock:
+        previous = _sessions.get(key)
+        _sessions[key] = {
+            "turns": deque(turns, maxlen=MAX_TURNS),
+            "summary": previous["summary"] if previous else "",
+            "expires_at": time.time() + TTL,
+            "head": head,
+            "own": set(own),
+        }
+        _sessions.move_to_end(key)
+        while len(_sessions) > MAX_SESSIONS:
+            _sessions.popitem(last=False)
+
+
+def record(user_id, session_id, role: str, content: str, row: dict = None) -> None:
+    """
+    Append a persisted message to the cached window (no-op for cold sessions).
+    `row` is the saved message in to_dict() shape; without it the next check()
+    can't tell the row is ours and reloads the window.
+    """
+    with _lock:
+        s = _sessions.get((user_id, session_id))
+        if s is not None:
+            s["turns"].append({"role": role, "content": content})
+            s["expires_at"] = time.time() + TTL
+            if row is not None:
+                s["own"].add(row["id"] if row.get("id") is not None else row["timestamp"])
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+def _trim(key, turns: list[dict]) -> list[dict]:
+    """Drop the oldest turns until the window fits MAX_TOKENS (latest turn always kept)."""
+    total = sum(count_tokens(t["content"]) for t in turns)
+    cut = 0
+    while total > MAX_TOKENS and cut < len(turns) - 1:
+        total -= count_tokens(turns[cut]["content"])
+        cut += 1
+    if cut:
+        dropped = turns[:cut]
+        with _lock:
+            s = _sessions.get(key)
+            if s is not None:
+                # the cached window no longer needs what we trimmed
+                for _ in range(min(cut, len(s["turns"]))):
+                    s["turns"].popleft()
+        if SUMMARY:
+            threading.Thread(target=_summarize, args=(key, dropped), daemon=True).start()
+    return turns[cut:]
+
+
+def _summarize(key, dropped: list[dict]) -> None:
+    from Chatbot.bot import llm
+
+    with _lock:
+        s = _sessions.get(key)
+        previous = s["summary"] if s else ""
+    transcript = "\n".join(f'{t["role"]}: {t["content"]}' for t in dropped)
+    prompt = (
+        "Update the running summary of this real estate sales chat. Keep names, "
+        "budgets, preferences and promised follow-ups. Under 120 words.\n\n"
+        f"SUMMARY SO FAR:\n{previous or '(none)'}\n\nNEW TURNS:\n{transcript}"
+    )
+    try:
+        summary = llm.invoke(prompt).content.strip()
+    except Exception as e:
+        print(f"[WARN] history summary failed: {e}")
+        return
+    with _lock:
+        s = _sessions.get(key)
+        if s is not None:
+            s["summary"] = summary
+
+
+def history_for(user_id, session_id, user_msg: str, refreshed: bool = False) -> list[dict]:
+    """
+    History to send to the bot for this turn; the last item is `user_msg`.
+    The window is refresh()ed from the DB first (needs an app context) unless
+    the caller already did that itself (`refreshed`, e.g. asgi.py on its async
+    connection with newer_query() / check() / seed_query() / seed_rows()).
+    """
+    key = (user_id, session_id)
+    if not refreshed:
+        refresh(user_id, session_id)
+    cached = peek(user_id, session_id) or []
+
+    window = _trim(key, cached + [{"role": "user", "content": user_msg}])
+    with _lock:
+        summary = _sessions[key]["summary"] if key in _sessions else ""
+    if summary:
+        window.insert(0, {"role": "system", "content": f"Conversation so far: {summary}"})
+    return window
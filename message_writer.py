@@ -0,0 +1,203 @@
+# message_writer.py
+"""
+Persistence of chat turns (user row + AI row) for the web and voice bots.
+
+By default save_turn() inserts and commits both rows before returning, as
+before. With MESSAGE_WRITE_BEHIND=1 the rows are queued instead and a
+background thread bulk-inserts them, flushing every WRITE_BEHIND_BATCH rows or
+WRITE_BEHIND_INTERVAL seconds, whichever comes first. Commit latency and fsyncs
+leave the response path.
+
+Ordering is kept by a single FIFO writer and by stamping each row's timestamp
+when it is queued. Until a row is flushed it is visible through pending(), which
+history reads (chat_history, /ai/get_messages) merge in, so a session always
+sees its own writes.
+
+A batch that keeps failing is retried WRITE_BEHIND_ATTEMPTS times, then row by
+row; rows that still fail are logged and appended to WRITE_BEHIND_DEAD_LETTER
+(JSON lines) so the writer moves on. At exit the writer is stopped with a
+sentinel and joined before the remaining queue is flushed.
+"""
+import atexit
+import datetime
+import json
+import os
+import queue
+import threading
+import time
+
+from flask import current_app
+from sqlalchemy import insert
+
+import chat_history
+from database import db
+from models import AIMessage
+
+ENABLED = os.getenv("MESSAGE_WRITE_BEHIND", "0") == "1"
+BATCH_SIZE = int(os.getenv("WRITE_BEHIND_BATCH", "200"))
+INTERVAL = float(os.getenv("WRITE_BEHIND_INTERVAL", "0.5"))
+MAX_ATTEMPTS = int(os.getenv("WRITE_BEHIND_ATTEMPTS", "5"))          # per batch, then row by row
+SHUTDOWN_TIMEOUT = float(os.getenv("WRITE_BEHIND_SHUTDOWN_TIMEOUT", "10"))
+DEAD_LETTER = os.getenv("WRITE_BEHIND_DEAD_LETTER", os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "instance", "message_dead_letter.jsonl"))
+
+_queue = queue.Queue()
+_pending = {}             # (user_id, session_id) -> [row dict, ...] not yet committed
+_pending_lock = threading.Lock()
+_writer = None
+_writer_lock = threading.Lock()
+_STOP = object()          # queued by _drain: the writer finishes its batch and exits
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+def _row(user_id, session_id, role, message):
+    return dict(user_id=user_id, session_id=session_id, role=role, message=message,
+                timestamp=datetime.datetime.utcnow())
+
+
+def _to_dict(row):
+    return dict(row, id=None, timestamp=row["timestamp"].isoformat())
+
+
+def pending(user_id, session_id) -> list[dict]:
+    """Queued rows of a session in to_dict() shape (id is None until flushed)."""
+    with _pending_lock:
+        return [_to_dict(r) for r in _pending.get((user_id, session_id), [])]
+
+
+def _enqueue(row) -> dict:
+    _ensure_writer()
+    with _pending_lock:
+        _pending.setdefault((row["user_id"], row["session_id"]), []).append(row)
+    _queue.put(row)
+    return _to_dict(row)
+
+
+def save_turn(user_id, session_id, user_msg: str, ai_text: str):
+    """Persist one turn; returns (user_dict, ai_dict). Needs an app context."""
+    if ENABLED:
+        user = _enqueue(_row(user_id, session_id, "user", user_msg))
+        ai = _enqueue(_row(user_id, session_id, "ai", ai_text))
+    else:
+        user_row = AIMessage(user_id=user_id, session_id=session_id,
+                             role="user", message=user_msg)
+        ai_row = AIMessage(user_id=user_id, session_id=session_id,
+                           role="ai", message=ai_text)
+        db.session.add_all([user_row, ai_row])
+        db.session.commit()
+        user, ai = user_row.to_dict(), ai_row.to_dict()
+
+    chat_history.record(user_id, session_id, "user", user_msg, user)
+    chat_history.record(user_id, session_id, "ai", ai_text, ai)
+    return user, ai
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+def _ensure_writer():
+    global _writer
+    if _writer is not None:
+        return
+    with _writer_lock:
+        if _writer is None:
+            app = current_app._get_current_object()
+            _writer = threading.Thread(target=_run, args=(app,), daemon=True,
+                                       name="message-writer")
+            _writer.start()
+            atexit.register(_drain, app)
+
+
+def _take_batch(block: bool):
+    """(rows, stop?) – up to BATCH_SIZE rows; stop once the _STOP sentinel is seen."""
+    batch = []
+    deadline = time.monotonic() + INTERVAL
+    while len(batch) < BATCH_SIZE:
+        timeout = deadline - time.monotonic()
+        try:
+            if block and not batch:
+                row = _queue.get()                  # sleep until there is work
+                deadline = time.monotonic() + INTERVAL
+            elif timeout > 0 and block:
+                row = _queue.get(timeout=timeout)
+            else:
+                row = _queue.get_nowait()
+        except queue.Empty:
+            break
+        if row is _STOP:
+            return batch, True
+        batch.append(row)
+    return batch, False
+
+
+def _insert(app, rows: list[dict]) -> None:
+    with app.app_context():
+        try:
+            db.session.execute(insert(AIMessage), rows)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+
+def _dead_letter(row: dict, error: Exception) -> None:
+    print(f"[message_writer] dropping row for session {row['session_id']!r}: {error}")
+    try:
+        os.makedirs(os.path.dirname(DEAD_LETTER), exist_ok=True)
+        with open(DEAD_LETTER, "a", encoding="utf-8") as f:
+            f.write(json.dumps(dict(_to_dict(row), error=str(error)[:1000])) + "\n")
+    except OSError as e:
+        print(f"[message_writer] could not write dead letter {DEAD_LETTER}: {e}")
+
+
+def _flush(app, batch: list[dict]) -> None:
+    backoff = 0.5
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        try:
+            _insert(app, batch)
+            break
+        except Exception as e:
+            print(f"[message_writer] flush of {len(batch)} rows failed "
+                  f"(attempt {attempt}/{MAX_ATTEMPTS}): {e}")
+            if attempt < MAX_ATTEMPTS:
+                time.sleep(backoff)
+                backoff = min(backoff * 2, 10)
+    else:
+        # one bad row (e.g. DataError) must not stall the writer: isolate it
+        for row in batch:
+            try:
+                _insert(app, [row])
+            except Exception as e:
+                _dead_letter(row, e)
+
+    with _pending_lock:
+        for row in batch:
+            key = (row["user_id"], row["session_id"])
+            rows = [r for r in _pending.get(key, []) if r is not row]
+            if rows:
+                _pending[key] = rows
+            else:
+                _pending.pop(key, None)
+
+
+def _run(app):
+    while True:
+        batch, stop = _take_batch(block=True)
+        if batch:
+            _flush(app, batch)
+        if stop:
+            return
+
+
+def _drain(app):
+    # process exit: let the writer finish the batch it holds, then write the rest
+    # here – never both at once
+    _queue.put(_STOP)
+    _writer.join(SHUTDOWN_TIMEOUT)
+    if _writer.is_alive():
+        print(f"[message_writer] writer still busy after {SHUTDOWN_TIMEOUT}s, "
+              f"~{_queue.qsize()} queued rows not written")
+        return
+    while True:
+        batch, _ = _take_batch(block=False)
+        if not batch:
+            return
+        _flush(app, batch)
@@ -1,3 +1,5 @@
+import datetime
+
 from database import db
 
 class Customer(db.Model):
@@ -16,8 +18,32 @@ class Customer(db.Model):
             "project_id": self.project_id
         }
 
+class LeadSyncOutbox(db.Model):
+    """A customer row waiting to be appended to the leads Google Sheet (tasks/sheets_tasks.py)."""
+    __tablename__ = "lead_sync_outbox"
+    __table_args__ = (
+        db.Index("ix_lead_sync_outbox_status_due", "status", "next_attempt_at"),
+    )
+
+    id              = db.Column(db.Integer, primary_key=True)
+    customer_id     = db.Column(db.Integer, db.ForeignKey("customer.id"), nullable=False)
+    sheet_row       = db.Column(db.Text,    nullable=False)   # JSON list: the sheet row as of signup
+    status          = db.Column(db.String(10), nullable=False, default="pending")  # pending | sending | synced | failed
+    attempts        = db.Column(db.Integer, nullable=False, default=0)
+    last_error      = db.Column(db.Text,    nullable=True)
+    claim           = db.Column(db.String(36), nullable=True)  # id of the drain that is sending it
+    next_attempt_at = db.Column(db.DateTime, nullable=False, default=datetime.datetime.utcnow)
+    created_at      = db.Column(db.DateTime, nullable=False, default=datetime.datetime.utcnow)
+    synced_at       = db.Column(db.DateTime, nullable=True)
+
+
 class AIMessage(db.Model):
     __tablename__ = "ai_message"
+    # every hot read filters (user_id, session_id) and walks timestamp order;
+    # id breaks ties so keyset pagination is stable
+    __table_args__ = (
+        db.Index("ix_ai_message_user_session_ts", "user_id", "session_id", "timestamp", "id"),
+    )
 
     id         = db.Column(db.Integer, primary_key=True)
     user_id    = db.Column(db.String(36),  nullable=False)
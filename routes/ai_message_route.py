@@ -1,11 +1,37 @@
-from flask import Blueprint, request, jsonify
+import json
+
+from flask import Blueprint, Response, request, jsonify, stream_with_context
 from models  import AIMessage
 from database import db
-from Chatbot.bot import generate_response
-from tasks.voice_tasks import run_voice_agent
+from sqlalchemy import and_, or_, select
+import chat_history
+import message_writer
+from Chatbot.bot import generate_response, stream_response
+from tasks.voice_tasks import VOICE_WORKER_POOL, dispatch_voice_agent, run_voice_agent
 
 ai_bp = Blueprint("ai_routes", __name__)
 
+PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def _past_cursor(cursor_id: int, newer: bool):
+    """
+    Rows strictly after (newer=True) / before the cursor row in (timestamp, id)
+    order. The cursor's timestamp is read in SQL, never bound from Python:
+    SQLite's CURRENT_TIMESTAMP text has no fraction, a bound datetime has one,
+    so same-second rows would compare the wrong way round.
+    """
+    ts = select(AIMessage.timestamp).where(AIMessage.id == cursor_id).scalar_subquery()
+    if newer:
+        return or_(AIMessage.timestamp > ts, and_(AIMessage.timestamp == ts, AIMessage.id > cursor_id))
+    return or_(AIMessage.timestamp < ts, and_(AIMessage.timestamp == ts, AIMessage.id < cursor_id))
+
+
+def _sse(data, event=None):
+    head = f"event: {event}\n" if event else ""
+    return f"{head}data: {json.dumps(data)}\n\n"
+
 # ──────────────────────────────────────────────────────────────────────────────
 @ai_bp.route("/new_query", methods=["POST"])
 def new_query():
@@ -19,40 +45,106 @@ def new_query():
     if not all([user_id, session_id, user_msg]):
         return jsonify(error="user_id, session_id, message required"), 400
 
-    # save user message
-    user_row = AIMessage(user_id=user_id, session_id=session_id,
-                        role="user", message=user_msg)
-    db.session.add(user_row)
-
-    # pull last 19 previous msgs (so + current user = 20)
-    history_rows = (
-        AIMessage.query
-        .filter_by(user_id=user_id, session_id=session_id)
-        .order_by(AIMessage.timestamp.desc())
-        .limit(19)
-        .all()[::-1]
-    )
-    history = [{"role": r.role, "content": r.message} for r in history_rows]
-    history.append({"role": "user", "content": user_msg})
+    # rolling, token-trimmed window; the DB is only read for a cold session
+    history = chat_history.history_for(user_id, session_id, user_msg)
 
     # LLM
     bot = generate_response(project_name, history,False)
-    ai_row = AIMessage(user_id=user_id, session_id=session_id,
-                    role="ai", message=bot["text"])
-    db.session.add(ai_row)
-    db.session.commit()
+
+    # save user + AI message (queued when MESSAGE_WRITE_BEHIND=1)
+    user, ai = message_writer.save_turn(user_id, session_id, user_msg, bot["text"])
     print(f"AI Response: {bot['image_url']}")
-    return jsonify(user=user_row.to_dict(), ai=ai_row.to_dict(),
-                image_url=bot["image_url"]), 200
+    return jsonify(user=user, ai=ai, image_url=bot["image_url"]), 200
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Same as /new_query but streams the answer as Server-Sent Events:
+#   data: {"token": "..."}                         – as the model produces text
+#   event: done  / data: {user, ai, image_url}     – after the AI row is saved
+#   event: error / data: {error}
+@ai_bp.route("/new_query/stream", methods=["POST"])
+def new_query_stream():
+    data = request.get_json(force=True)
+
+    user_id      = data.get("user_id")
+    session_id   = data.get("session_id")
+    project_name = data.get("project_name", "Krupal Habitat")  # default
+    user_msg     = (data.get("message") or "").strip()
+
+    if not all([user_id, session_id, user_msg]):
+        return jsonify(error="user_id, session_id, message required"), 400
+
+    history = chat_history.history_for(user_id, session_id, user_msg)
+
+    def events():
+        parts = []
+        try:
+            for token in stream_response(project_name, history, False):
+                parts.append(token)
+                yield _sse({"token": token})
+
+            user, ai = message_writer.save_turn(user_id, session_id, user_msg,
+                                                "".join(parts).strip())
+            yield _sse(dict(user=user, ai=ai, image_url=None), event="done")
+        except Exception as e:
+            db.session.rollback()
+            print(f"❌ Streaming failed: {e}")
+            yield _sse({"error": "Response generation failed"}, event="error")
+
+    return Response(
+        stream_with_context(events()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 # ──────────────────────────────────────────────────────────────────────────────
 @ai_bp.route("/get_messages/<string:user_id>/<string:session_id>", methods=["GET"])
 def get_messages(user_id, session_id):
-    rows = (AIMessage.query
-            .filter_by(user_id=user_id, session_id=session_id)
-            .order_by(AIMessage.timestamp)
-            .all())
-    return jsonify([r.to_dict() for r in rows]), 200
+    """
+    Without query params: the whole session, oldest first (legacy response).
+    With ?limit=N and optionally ?before=<id> / ?after=<id>: one keyset page,
+    {"messages": [...oldest first], "has_more", "next_before", "next_after"}.
+    No ?before/?after means the latest page.
+    """
+    base = AIMessage.query.filter_by(user_id=user_id, session_id=session_id)
+    if not any(k in request.args for k in ("limit", "before", "after")):
+        rows = base.order_by(AIMessage.timestamp, AIMessage.id).all()
+        return jsonify([r.to_dict() for r in rows]
+                       + message_writer.pending(user_id, session_id)), 200
+
+    limit = min(max(request.args.get("limit", PAGE_SIZE, type=int), 1), MAX_PAGE_SIZE)
+    before = request.args.get("before", type=int)
+    after = request.args.get("after", type=int)
+
+    if after is not None:
+        # cursors are looked up within this session only
+        if base.filter(AIMessage.id == after).first() is None:
+            return jsonify(error="unknown cursor"), 400
+        rows = (base.filter(_past_cursor(after, newer=True))
+                .order_by(AIMessage.timestamp, AIMessage.id)
+                .limit(limit + 1).all())
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+    else:
+        query = base
+        if before is not None:
+            if base.filter(AIMessage.id == before).first() is None:
+                return jsonify(error="unknown cursor"), 400
+            query = query.filter(_past_cursor(before, newer=False))
+        rows = (query.order_by(AIMessage.timestamp.desc(), AIMessage.id.desc())
+                .limit(limit + 1).all())
+        has_more = len(rows) > limit
+        rows = rows[:limit][::-1]
+
+    messages = [r.to_dict() for r in rows]
+    if before is None and not has_more:
+        # newest page: include rows still queued by the write-behind writer
+        messages += message_writer.pending(user_id, session_id)
+    return jsonify(
+        messages=messages,
+        has_more=has_more,
+        next_before=rows[0].id if rows else None,
+        next_after=rows[-1].id if rows else None,
+    ), 200
 
 @ai_bp.route("/start_voice_agent", methods=["POST"])
 def start_voice_agent():
@@ -66,5 +158,8 @@ def start_voice_agent():
         return jsonify(error="room, identity, user_id, and session_id required"), 400
 
 
-    run_voice_agent.delay(room, identity,user_id,session_id)
+    if VOICE_WORKER_POOL:
+        dispatch_voice_agent(room, identity, user_id, session_id)
+    else:
+        run_voice_agent.delay(room, identity,user_id,session_id)
     return jsonify(message="Voice agent started"), 202
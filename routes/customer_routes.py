@@ -1,33 +1,12 @@
 # routes/customer_routes.py
 from flask import Blueprint, request, jsonify
-from models import Customer
+import json
+
+from models import Customer, LeadSyncOutbox
 from database import db
 
-from google.oauth2 import service_account
-from googleapiclient.discovery import build
-
-SPREADSHEET_ID = '1ZsHAcjTV2XbT8BB9VoY4TxEdx7NvmQWt3diUKZ7ym38'
-RANGE_NAME = 'Sheet1!A1'  # Or A2 if A1 has headers
-SCOPES = ['https://www.googleapis.com/auth/spreadsheets']
-creds = service_account.Credentials.from_service_account_file(
-    'credentials.json', scopes=SCOPES
-)
-sheets_service = build('sheets', 'v4', credentials=creds)
-
-def append_to_google_sheet(customer):
-    values = [[
-        customer.name,
-        customer.email,
-        customer.phone or '',
-        str(customer.project_id) if customer.project_id else ''
-    ]]
-    body = {'values': values}
-    sheets_service.spreadsheets().values().append(
-        spreadsheetId=SPREADSHEET_ID,
-        range=RANGE_NAME,
-        valueInputOption='USER_ENTERED',
-        body=body
-    ).execute()
+from tasks.sheets_tasks import request_sync
+from utils.google_sheets import customer_row
 
 customer_bp = Blueprint("customer_routes", __name__)
 
@@ -48,11 +27,12 @@ def add_customer():
         project_id=data.get("project_id")
     )
     db.session.add(new_customer)
+    db.session.flush()  # assigns new_customer.id
+    # Google Sheet sync goes through the outbox (tasks/sheets_tasks.py): the
+    # lead is recorded in the same commit and appended in the background
+    db.session.add(LeadSyncOutbox(customer_id=new_customer.id,
+                                  sheet_row=json.dumps(customer_row(new_customer))))
     db.session.commit()
-
-    try:
-        append_to_google_sheet(new_customer)
-    except Exception as e:
-        print(f"[Google Sheets Error] {e}")  # Logging only, don't fail the request
+    request_sync()
 
     return jsonify(new_customer.to_dict()), 201
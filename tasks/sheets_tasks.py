@@ -0,0 +1,112 @@
+import datetime
+import json
+import os
+import uuid
+
+from dotenv import load_dotenv
+from sqlalchemy import or_, select, update
+
+from celery_app import celery
+
+load_dotenv()
+
+# New customers are written to lead_sync_outbox in the same commit as the
+# customer row; sync_leads drains it into the Google Sheet, many rows per call.
+BATCH_SIZE = int(os.getenv("LEAD_SYNC_BATCH", "100"))
+MAX_BATCHES = int(os.getenv("LEAD_SYNC_MAX_BATCHES", "20"))        # per task run
+MAX_ATTEMPTS = int(os.getenv("LEAD_SYNC_MAX_ATTEMPTS", "8"))
+BACKOFF_BASE = float(os.getenv("LEAD_SYNC_BACKOFF", "30"))         # seconds, doubled per attempt
+BACKOFF_MAX = float(os.getenv("LEAD_SYNC_BACKOFF_MAX", "3600"))
+CLAIM_TIMEOUT = int(os.getenv("LEAD_SYNC_CLAIM_TIMEOUT", "300"))   # reclaim rows of a dead worker
+SYNC_COUNTDOWN = int(os.getenv("LEAD_SYNC_COUNTDOWN", "5"))        # lets signup bursts share a call
+
+_app = None
+
+
+def _flask_app():
+    global _app
+    if _app is None:
+        from database import db_app
+        _app = db_app(__name__)
+    return _app
+
+
+def request_sync():
+    """Kick a drain shortly after a signup commit; never fails the caller."""
+    try:
+        sync_leads.apply_async(countdown=SYNC_COUNTDOWN)
+    except Exception as e:
+        print(f"[lead sync] could not queue sync, beat will pick it up: {e}")
+
+
+def _claim(db, LeadSyncOutbox, now):
+    """Atomically mark up to BATCH_SIZE due rows as ours; returns them."""
+    token = str(uuid.uuid4())
+    stale = now - datetime.timedelta(seconds=CLAIM_TIMEOUT)
+    is_due = or_(
+        (LeadSyncOutbox.status == "pending") & (LeadSyncOutbox.next_attempt_at <= now),
+        (LeadSyncOutbox.status == "sending") & (LeadSyncOutbox.next_attempt_at <= stale),
+    )
+    # SKIP LOCKED: overlapping drains (every signup + beat) each take other rows
+    # instead of queueing on the same ones (SQLite has no row locks and ignores it)
+    ids = db.session.execute(
+        select(LeadSyncOutbox.id)
+        .where(is_due)
+        .order_by(LeadSyncOutbox.id)
+        .limit(BATCH_SIZE)
+        .with_for_update(skip_locked=True)
+    ).scalars().all()
+    if not ids:
+        db.session.commit()
+        return []
+    # the due condition is re-checked on the locked rows, so a row claimed by
+    # another drain in the meantime is never taken twice
+    db.session.execute(
+        update(LeadSyncOutbox)
+        .where(LeadSyncOutbox.id.in_(ids), is_due)
+        .values(status="sending", claim=token, next_attempt_at=now)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    return (LeadSyncOutbox.query.filter_by(claim=token, status="sending")
+            .order_by(LeadSyncOutbox.id).all())
+
+
+@celery.task
+def sync_leads():
+    """Append pending leads to the sheet, one values().append per batch."""
+    from database import db
+    from models import LeadSyncOutbox
+    from utils.google_sheets import append_rows
+
+    synced = failed = 0
+    with _flask_app().app_context():
+        for _ in range(MAX_BATCHES):
+            now = datetime.datetime.utcnow()
+            rows = _claim(db, LeadSyncOutbox, now)
+            if not rows:
+                break
+            try:
+                append_rows([json.loads(r.sheet_row) for r in rows])
+            except Exception as e:
+                print(f"[lead sync] append of {len(rows)} rows failed: {e}")
+                for r in rows:
+                    r.attempts += 1
+                    r.last_error = str(e)[:1000]
+                    r.claim = None
+                    if r.attempts >= MAX_ATTEMPTS:
+                        r.status = "failed"
+                    else:
+                        r.status = "pending"
+                        delay = min(BACKOFF_BASE * 2 ** (r.attempts - 1), BACKOFF_MAX)
+                        r.next_attempt_at = now + datetime.timedelta(seconds=delay)
+                db.session.commit()
+                failed += len(rows)
+                break   # the rest waits for the backoff / next beat
+            for r in rows:
+                r.status = "synced"
+                r.synced_at = now
+                r.last_error = None
+            db.session.commit()
+            synced += len(rows)
+    return {"synced": synced, "failed": failed}
@@ -1,9 +1,24 @@
+import json
 import os
 from celery_app import celery
 import subprocess
 from dotenv import load_dotenv
 
 load_dotenv()
+
+# Persistent worker pool (voice_agent/worker_pool.py) reads dispatches from here
+VOICE_WORKER_POOL = os.getenv("VOICE_WORKER_POOL", "0") == "1"
+VOICE_QUEUE = os.getenv("VOICE_QUEUE", "voice:dispatch")
+VOICE_QUEUE_REDIS_URL = os.getenv("VOICE_QUEUE_REDIS_URL", "redis://localhost:6379/0")
+
+
+def dispatch_voice_agent(room, identity, user_id, session_id):
+    """Hand a call to the warm worker pool instead of spawning a process."""
+    import redis
+
+    job = dict(room=room, identity=identity, user_id=str(user_id), session_id=str(session_id))
+    redis.Redis.from_url(VOICE_QUEUE_REDIS_URL).rpush(VOICE_QUEUE, json.dumps(job))
+
 @celery.task
 def run_voice_agent(room, identity, user_id, session_id):
     url = os.getenv("LIVEKIT_URL")
@@ -0,0 +1,6 @@
+import os
+import sys
+
+# the app modules import each other from the repo root (see app.py)
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+os.environ.setdefault("PRELOAD_FAISS", "0")
@@ -0,0 +1,24 @@
+import pytest
+
+from Chatbot import answer_cache
+
+VEC = [0.6, 0.8, 0.0]
+
+
+@pytest.fixture(autouse=True)
+def empty_cache(monkeypatch):
+    monkeypatch.setattr(answer_cache, "_buckets", {})
+
+
+def test_hit_needs_same_chunks_dialog_and_version():
+    answer_cache.store("krupal", False, VEC, ["c1"], ("docs", "v1"), "answer", 1.0, dialog=None)
+    assert answer_cache.lookup("krupal", False, VEC, ["c1"], ("docs", "v1")) == "answer"
+    assert answer_cache.lookup("krupal", False, VEC, ["c2"], ("docs", "v1")) is None
+    assert answer_cache.lookup("krupal", False, VEC, ["c1"], ("docs", "v1"), dialog="abc") is None
+    assert answer_cache.lookup("krupal", False, VEC, ["c1"], ("docs", "v2")) is None
+
+
+def test_unknown_version_is_never_cached():
+    answer_cache.store("krupal", False, VEC, ["c1"], None, "answer", 1.0)
+    assert answer_cache._buckets == {}
+    assert answer_cache.lookup("krupal", False, VEC, ["c1"], None) is None
@@ -0,0 +1,44 @@
+from langchain_core.documents import Document
+
+from Chatbot import fusion
+
+
+def _doc(text, **metadata):
+    return Document(page_content=text, metadata=metadata)
+
+
+def test_chunk_in_both_lists_ranks_first():
+    shared = _doc("plot 12B is a corner plot")
+    dense = [_doc("clubhouse timings"), shared]
+    lexical = [shared, _doc("payment plan in 3 instalments")]
+    ranked = fusion.rrf([dense, lexical], rrf_k=60)
+    assert ranked[0][0].page_content == "plot 12B is a corner plot"
+    assert ranked[0][1] == 1 / 62 + 1 / 61
+    assert len(ranked) == 3
+
+
+def test_ties_break_by_best_rank_then_list_order_not_raw_score():
+    a = [_doc("krupal top hit", score=0.2), _doc("krupal second", score=0.9)]
+    b = [_doc("ramvan top hit", score=35.0), _doc("ramvan second", score=1.0)]
+    texts = [d.page_content for d, _ in fusion.rrf([a, b])]
+    assert texts == ["krupal top hit", "ramvan top hit", "krupal second", "ramvan second"]
+
+
+def test_same_text_collapses_and_keeps_best_ranked_copy():
+    dense = [_doc("x"), _doc("RERA  number\nPR/GJ/123", source="dense")]
+    lexical = [_doc("RERA number PR/GJ/123", source="bm25")]
+    ranked = fusion.rrf([dense, lexical])
+    rera = [d for d, _ in ranked if "RERA" in d.page_content]
+    assert len(rera) == 1 and rera[0].metadata["source"] == "bm25"
+
+
+def test_fuse_drops_near_duplicates_and_keeps_top_k():
+    a = [_doc("gym pool clubhouse garden theatre jogging track kids play area yoga deck"),
+         _doc("payment plan")]
+    b = [_doc("Gym, pool, clubhouse, garden, theatre, jogging track, kids play area, yoga deck."),
+         _doc("site office hours")]
+    fused = fusion.fuse([a, b], top_k=2)
+    assert [d.page_content for d in fused] == [
+        "gym pool clubhouse garden theatre jogging track kids play area yoga deck",
+        "payment plan",
+    ]
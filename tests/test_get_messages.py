@@ -0,0 +1,64 @@
+import pytest
+from flask import Flask
+from sqlalchemy import text
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setenv("DATABASE_URL", "sqlite://")
+    from database import configure_db, db
+    from routes.ai_message_route import ai_bp
+
+    app = Flask(__name__)
+    configure_db(app)
+    app.register_blueprint(ai_bp, url_prefix="/ai")
+    with app.app_context():
+        db.create_all()
+        # the text CURRENT_TIMESTAMP stores: whole seconds, so a turn's user and
+        # AI rows (and usually the next turn's) share a timestamp
+        stamps = ["2026-01-01 10:00:00"] * 6 + ["2026-01-01 10:00:01"] * 2
+        for i, ts in enumerate(stamps, start=1):
+            db.session.execute(text(
+                "INSERT INTO ai_message (id, user_id, session_id, role, message, timestamp) "
+                "VALUES (:id, 'u', 's', :role, :msg, :ts)"
+            ), dict(id=i, role="user" if i % 2 else "ai", msg=f"m{i}", ts=ts))
+        db.session.execute(text(
+            "INSERT INTO ai_message (id, user_id, session_id, role, message, timestamp) "
+            "VALUES (9, 'other', 'x', 'user', 'not yours', '2026-01-01 10:00:00')"
+        ))
+        db.session.commit()
+        yield app.test_client()
+        db.session.remove()
+        db.drop_all()
+
+
+def _ids(resp):
+    assert resp.status_code == 200
+    return [m["id"] for m in resp.get_json()["messages"]]
+
+
+def test_before_excludes_cursor_within_same_second(client):
+    assert _ids(client.get("/ai/get_messages/u/s?limit=3&before=4")) == [1, 2, 3]
+
+
+def test_after_does_not_skip_rows_within_same_second(client):
+    assert _ids(client.get("/ai/get_messages/u/s?limit=3&after=1")) == [2, 3, 4]
+
+
+def test_after_crosses_into_next_second(client):
+    assert _ids(client.get("/ai/get_messages/u/s?limit=3&after=5")) == [6, 7, 8]
+
+
+def test_walking_back_returns_every_row_once(client):
+    page = client.get("/ai/get_messages/u/s?limit=3").get_json()
+    seen = [m["id"] for m in page["messages"]]
+    for _ in range(10):   # bounded: a cursor that repeats its own row never ends
+        if not page["has_more"]:
+            break
+        page = client.get(f"/ai/get_messages/u/s?limit=3&before={page['next_before']}").get_json()
+        seen = [m["id"] for m in page["messages"]] + seen
+    assert seen == list(range(1, 9))
+
+
+def test_cursor_from_another_session_is_rejected(client):
+    assert client.get("/ai/get_messages/u/s?limit=3&before=9").status_code == 400
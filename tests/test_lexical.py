@@ -0,0 +1,63 @@
+import os
+
+import pytest
+from langchain_core.documents import Document
+
+from Chatbot import lexical
+
+CHUNKS = [
+    ("d1", Document(page_content="Plot 12B is a corner plot facing the garden.",
+                    metadata={"project": "krupal", "page": 1})),
+    ("d2", Document(page_content="RERA number PR/GJ/AHMEDABAD/123 for Krupal Habitat.",
+                    metadata={"project": "krupal", "page": 2})),
+    ("d3", Document(page_content="Ramvan villas start at ₹1,20,00,000 with a private garden.",
+                    metadata={"project": "ramvan", "page": 1})),
+    ("d4", Document(page_content="The clubhouse has a gym, pool and theatre.",
+                    metadata={"project": "ramvan", "page": 4})),
+]
+
+
+@pytest.fixture
+def index_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(lexical, "_indexes", {})
+    assert lexical.write(str(tmp_path), CHUNKS) == 4
+    return str(tmp_path)
+
+
+def test_tokenize_joins_digit_groups_and_drops_stopwords():
+    assert lexical.tokenize("What is the price of Plot-12B? ₹20,000") == ["price", "plot", "12b", "20000"]
+
+
+def test_exact_terms_rank_their_chunk_first(index_dir):
+    hits = lexical.search(index_dir, "rera number", 2)
+    assert hits[0].id == "d2"
+    assert hits[0].metadata["project"] == "krupal" and hits[0].metadata["score"] > 0
+    assert lexical.search(index_dir, "12000000 villas", 1)[0].id == "d3"
+
+
+def test_k_and_filter(index_dir):
+    assert [d.id for d in lexical.search(index_dir, "garden", 5)] in (["d1", "d3"], ["d3", "d1"])
+    assert [d.id for d in lexical.search(index_dir, "garden", 1, {"project": "ramvan"})] == ["d3"]
+    assert [d.id for d in lexical.search(index_dir, "garden", 5, {"page": [1, 2], "project": "krupal"})] == ["d1"]
+    assert lexical.search(index_dir, "helipad", 5) == []
+
+
+def test_stale_or_missing_index_returns_nothing(index_dir, tmp_path):
+    assert lexical.is_current(index_dir)
+    pkl = os.path.join(index_dir, "index.pkl")
+    open(pkl, "w").close()
+    bm25 = os.stat(os.path.join(index_dir, lexical.BM25_FILE)).st_mtime_ns
+    os.utime(pkl, ns=(bm25 + 10**9, bm25 + 10**9))       # FAISS rebuilt after bm25.json
+    assert not lexical.is_current(index_dir)
+    assert lexical.search(index_dir, "rera", 3) == []
+    assert lexical.search(str(tmp_path / "missing"), "rera", 3) == []
+
+
+def test_rewritten_index_is_reloaded(index_dir):
+    assert lexical.search(index_dir, "helipad", 1) == []
+    lexical.write(index_dir, CHUNKS + [("d5", Document(page_content="A helipad near the site.",
+                                                       metadata={"project": "krupal"}))])
+    path = os.path.join(index_dir, lexical.BM25_FILE)
+    later = os.stat(path).st_mtime_ns + 10**9
+    os.utime(path, ns=(later, later))
+    assert [d.id for d in lexical.search(index_dir, "helipad", 1)] == ["d5"]
@@ -0,0 +1,176 @@
+"""
+utils/qdrant_client.py against a local Qdrant stand-in: qdrant-client's
+in-process mode (QdrantClient(":memory:")), used directly for the gRPC path
+and behind a small HTTP server speaking the REST routes the module calls.
+"""
+import json
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+pytest.importorskip("qdrant_client")
+from qdrant_client import QdrantClient, models  # noqa: E402
+
+from utils import qdrant_client as qc  # noqa: E402
+
+DOCS = [
+    {"id": 1, "embedding": [1.0, 0.0, 0.0], "text": "plot 12B corner", "payload": {"project": "krupal"}},
+    {"id": 2, "embedding": [0.9, 0.1, 0.0], "text": "clubhouse", "payload": {"project": "ramvan"}},
+    {"id": 3, "embedding": [0.0, 1.0, 0.0], "text": "payment plan", "payload": {"project": "krupal"}},
+]
+
+
+def _standin_handler(local: QdrantClient):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def _reply(self, status, body):
+            data = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _route(self):
+            m = re.fullmatch(r"/collections/([^/]+)(/.*)?", self.path.split("?")[0])
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            name, path = m.group(1), m.group(2) or ""
+            if not local.collection_exists(name):
+                return self._reply(404, {"status": {"error": f"Collection {name} not found"}})
+            if path == "" and self.command == "GET":
+                config = local.get_collection(name).config
+                return self._reply(200, {"result": {"config": {"metadata": config.metadata}}})
+            if path == "" and self.command == "PATCH":
+                local.update_collection(name, metadata=body["metadata"])
+                return self._reply(200, {"result": True})
+            if self.command == "PUT" and path == "/points":
+                local.upsert(name, points=[models.PointStruct(**p) for p in body["points"]])
+                return self._reply(200, {"result": {"status": "completed"}})
+            if path == "/points/search/batch":
+                results = local.query_batch_points(name, [
+                    models.QueryRequest(query=s["vector"], limit=s["limit"], with_payload=True,
+                                        filter=models.Filter.model_validate(s["filter"]) if s.get("filter") else None)
+                    for s in body["searches"]
+                ])
+                return self._reply(200, {"result": [
+                    [{"id": p.id, "score": p.score, "payload": p.payload} for p in r.points] for r in results
+                ]})
+            if path == "/points/count":
+                return self._reply(200, {"result": {"count": local.count(name, exact=True).count}})
+            return self._reply(404, {"status": {"error": "unknown route"}})
+
+        do_GET = do_PUT = do_PATCH = do_POST = _route
+
+    return Handler
+
+
+@pytest.fixture
+def local():
+    client = QdrantClient(":memory:")
+    client.create_collection("docs", vectors_config=models.VectorParams(
+        size=3, distance=models.Distance.COSINE))
+    return client
+
+
+@pytest.fixture
+def rest(local, monkeypatch):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _standin_handler(local))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setattr(qc, "QDRANT_URL", f"http://127.0.0.1:{server.server_port}")
+    monkeypatch.setattr(qc, "PREFER_GRPC", False)
+    monkeypatch.setattr(qc, "MAX_RETRIES", 0)
+    monkeypatch.setattr(qc, "_session", None)
+    yield local
+    server.shutdown()
+
+
+@pytest.fixture
+def grpc_path(local, monkeypatch):
+    monkeypatch.setattr(qc, "QDRANT_URL", "http://stand-in")
+    monkeypatch.setattr(qc, "PREFER_GRPC", True)
+    monkeypatch.setattr(qc, "_grpc", local)
+    return local
+
+
+def test_rest_upload_search_and_count(rest):
+    assert qc.upload_to_qdrant(DOCS, "docs", batch_size=2, concurrency=2)["points"] == 3
+    hits = qc.query_qdrant([1.0, 0.0, 0.0], 2, "docs")
+    assert [h["id"] for h in hits] == [1, 2]
+    assert hits[0]["text"] == "plot 12B corner"
+    assert qc.count_points("docs") == 3
+
+
+def test_rest_filter(rest):
+    qc.upload_to_qdrant(DOCS, "docs")
+    flt = {"must": [{"key": "project", "match": {"value": "krupal"}}]}
+    assert [h["id"] for h in qc.query_qdrant([1.0, 0.0, 0.0], 3, "docs", flt)] == [1, 3]
+
+
+def test_rest_missing_collection_raises(rest):
+    with pytest.raises(requests.HTTPError):
+        qc.query_qdrant([1.0, 0.0, 0.0], 2, "missing")
+
+
+def test_unreachable_returns_no_hits(monkeypatch):
+    monkeypatch.setattr(qc, "QDRANT_URL", "http://127.0.0.1:9")   # discard port, nothing listens
+    monkeypatch.setattr(qc, "PREFER_GRPC", False)
+    monkeypatch.setattr(qc, "MAX_RETRIES", 0)
+    monkeypatch.setattr(qc, "_session", None)
+    assert qc.search_batch([[1.0, 0.0, 0.0], [0.0, 1.0, 0.0]], 2, "docs") == [[], []]
+
+
+def test_grpc_batch_search_with_filter(grpc_path):
+    qc.upload_to_qdrant(DOCS, "docs")
+    flt = {"must": [{"key": "project", "match": {"value": "krupal"}}]}
+    hits = qc.search_batch([[1.0, 0.0, 0.0], [0.0, 1.0, 0.0]], 1, "docs", flt)
+    assert [[h["id"] for h in q] for q in hits] == [[1], [3]]
+    assert hits[1][0]["payload"]["project"] == "krupal"
+
+
+def test_grpc_api_errors_are_raised(grpc_path):
+    with pytest.raises(ValueError):
+        qc.search_batch([[1.0, 0.0, 0.0]], 1, "missing")
+
+
+def test_every_upload_stamps_a_new_content_version(rest):
+    assert qc.content_version("docs") is None            # never ingested through us
+    qc.upload_to_qdrant(DOCS, "docs")
+    first = qc.content_version("docs")
+    qc.upload_to_qdrant(DOCS, "docs")                    # same ids, same point count
+    second = qc.content_version("docs")
+    assert first and second and first != second
+    assert qc.count_points("docs") == 3
+
+
+def test_grpc_content_version(grpc_path):
+    qc.upload_to_qdrant(DOCS, "docs")
+    assert qc.content_version("docs") == grpc_path.get_collection("docs").config.metadata[qc.VERSION_KEY]
+
+
+def test_store_version_is_none_when_unknown(monkeypatch):
+    from Chatbot.vectorstores import QdrantStore
+
+    monkeypatch.setattr(qc, "QDRANT_URL", "http://127.0.0.1:9")
+    monkeypatch.setattr(qc, "PREFER_GRPC", False)
+    monkeypatch.setattr(qc, "MAX_RETRIES", 0)
+    monkeypatch.setattr(qc, "_session", None)
+    monkeypatch.setattr(QdrantStore, "_versions", {})
+    assert QdrantStore("docs").version() is None
+    assert QdrantStore._versions == {}                   # a failure is not remembered
+
+
+def test_store_version_follows_reingest(rest, monkeypatch):
+    from Chatbot import vectorstores
+
+    monkeypatch.setattr(vectorstores, "VERSION_TTL", 0)
+    monkeypatch.setattr(vectorstores.QdrantStore, "_versions", {})
+    store = vectorstores.QdrantStore("docs")
+    qc.upload_to_qdrant(DOCS, "docs")
+    before = store.version()
+    qc.upload_to_qdrant(DOCS, "docs")
+    assert before is not None and store.version() != before
@@ -0,0 +1,55 @@
+import pytest
+
+from Chatbot import catalog, router
+
+CATALOG = {"general_bot": {
+    "krupal habitat": {"index": "krupalfinal_faiss", "aliases": ["krupal", "krupal dholera"]},
+    "ramvan villas": {"index": "ramvan_faiss", "aliases": ["ramvan", "ram van"]},
+}}
+
+
+@pytest.fixture(autouse=True)
+def fake_catalog(monkeypatch):
+    monkeypatch.setattr(catalog, "_catalog", CATALOG)
+    monkeypatch.setattr(router, "_tables", {})
+    monkeypatch.setattr(router, "USE_CENTROIDS", False)
+
+
+def _llm(answer):
+    calls = []
+
+    def fallback(query):
+        calls.append(query)
+        return answer
+    return fallback, calls
+
+
+def test_exact_aliases_route_locally():
+    llm, calls = _llm("none")
+    assert router.route("price of a plot in Krupal Dholera?", llm_fallback=llm) == ["krupal habitat"]
+    assert set(router.route("compare ram van and krupal", llm_fallback=llm)) == {"krupal habitat", "ramvan villas"}
+    assert calls == []
+
+
+@pytest.mark.parametrize("query, project", [
+    ("krupel price list", "krupal habitat"),
+    ("is krupaal near the airport", "krupal habitat"),
+    ("ramvaan villa sizes", "ramvan villas"),
+])
+def test_one_typo_routes_by_fuzzy_match(query, project):
+    llm, calls = _llm("none")
+    assert router.route(query, llm_fallback=llm) == [project]
+    assert calls == []
+
+
+def test_unrelated_words_route_to_none_without_llm():
+    llm, calls = _llm("krupal habitat")
+    assert router.route("is there a ramadan offer", llm_fallback=llm) == []
+    assert router.route("what is dholera like", llm_fallback=llm) == []
+    assert calls == []
+
+
+def test_near_miss_asks_the_llm():
+    llm, calls = _llm("Krupal Habitat, unknown")
+    assert router.route("krupeel payment plan", llm_fallback=llm) == ["krupal habitat"]
+    assert calls == ["krupeel payment plan"]
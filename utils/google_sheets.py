@@ -0,0 +1,51 @@
+import os
+import threading
+
+from dotenv import load_dotenv
+
+#used to push new leads (customers) into the sales Google Sheet.
+load_dotenv()
+
+SPREADSHEET_ID = os.getenv("LEADS_SPREADSHEET_ID", "1ZsHAcjTV2XbT8BB9VoY4TxEdx7NvmQWt3diUKZ7ym38")
+RANGE_NAME = os.getenv("LEADS_SHEET_RANGE", "Sheet1!A1")  # Or A2 if A1 has headers
+CREDENTIALS_FILE = os.getenv("GOOGLE_CREDENTIALS_FILE", "credentials.json")
+SCOPES = ['https://www.googleapis.com/auth/spreadsheets']
+
+_service = None
+_lock = threading.Lock()
+
+
+def get_service():
+    # built on first use, so importing this (or the routes) never reads the
+    # credentials file or loads the discovery client
+    global _service
+    with _lock:
+        if _service is None:
+            from google.oauth2 import service_account
+            from googleapiclient.discovery import build
+
+            creds = service_account.Credentials.from_service_account_file(
+                CREDENTIALS_FILE, scopes=SCOPES
+            )
+            _service = build('sheets', 'v4', credentials=creds, cache_discovery=False)
+    return _service
+
+
+def customer_row(customer) -> list:
+    return [
+        customer.name,
+        customer.email,
+        customer.phone or '',
+        str(customer.project_id) if customer.project_id else ''
+    ]
+
+
+def append_rows(rows: list):
+    """Append several rows with one values().append call."""
+    return get_service().spreadsheets().values().append(
+        spreadsheetId=SPREADSHEET_ID,
+        range=RANGE_NAME,
+        valueInputOption='USER_ENTERED',
+        insertDataOption='INSERT_ROWS',
+        body={'values': rows},
+    ).execute()
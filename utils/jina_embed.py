@@ -1,33 +1,142 @@
+import hashlib
+import json
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
 import requests
 from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 #used to create the embeddings using Jina embeddings.
-load_dotenv() 
+load_dotenv()
 
 JINA_API_KEY = os.getenv("JINA_API_KEY")
-JINA_EMBEDDING_ENDPOINT = "https://api.jina.ai/v1/embeddings"
+JINA_EMBEDDING_ENDPOINT = os.getenv("JINA_EMBEDDING_ENDPOINT", "https://api.jina.ai/v1/embeddings")
+JINA_MODEL = os.getenv("JINA_MODEL", "jina-embeddings-v2-base-en")
+
+BATCH_SIZE = int(os.getenv("JINA_BATCH_SIZE", "64"))        # texts per request
+CONCURRENCY = int(os.getenv("JINA_CONCURRENCY", "4"))       # requests in flight
+TIMEOUT = (5, float(os.getenv("JINA_TIMEOUT", "60")))       # (connect, read) seconds
+MAX_RETRIES = int(os.getenv("JINA_MAX_RETRIES", "5"))
+CACHE_DIR = os.getenv("JINA_CACHE_DIR")                     # unset = no disk cache
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def _get_session() -> requests.Session:
+    # one pooled session per process; 429/5xx are retried with exponential
+    # backoff (0.5s, 1s, 2s, ...), honouring Retry-After
+    global _session
+    with _session_lock:
+        if _session is None:
+            if not JINA_API_KEY:
+                raise ValueError("JINA_API_KEY not found in environment variables.")
+            retry = Retry(
+                total=MAX_RETRIES,
+                backoff_factor=0.5,
+                status_forcelist=(429, 500, 502, 503, 504),
+                allowed_methods=frozenset({"POST"}),
+                raise_on_status=False,
+            )
+            adapter = HTTPAdapter(max_retries=retry, pool_connections=1,
+                                  pool_maxsize=CONCURRENCY)
+            session = requests.Session()
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            #JINA API KEY is used for Authorization
+            session.headers.update({
+                "Authorization": f"Bearer {JINA_API_KEY}",
+                "Content-Type": "application/json",
+            })
+            _session = session
+    return _session
+
+
+# ──────────────────────────────────────────────
+# Disk cache: one JSON file per text, keyed by sha256(model + text)
+# ──────────────────────────────────────────────
+def _key(text: str) -> str:
+    return hashlib.sha256(f"{JINA_MODEL}\0{text}".encode("utf-8")).hexdigest()
+
+
+def _cache_path(key: str) -> str:
+    return os.path.join(CACHE_DIR, key[:2], key + ".json")
+
+
+def _cache_get(key: str):
+    try:
+        with open(_cache_path(key), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _cache_put(key: str, vector: list) -> None:
+    path = _cache_path(key)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{threading.get_ident()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(vector, f)
+    os.replace(tmp, path)
+
+
+# ──────────────────────────────────────────────
+def _post_batch(texts: list) -> list:
+    response = _get_session().post(
+        JINA_EMBEDDING_ENDPOINT,
+        json={"input": texts, "model": JINA_MODEL},
+        timeout=TIMEOUT,
+    )
+    response.raise_for_status()
+    data = sorted(response.json()["data"], key=lambda d: d["index"])
+    return [d["embedding"] for d in data]
+
+
+def embed_texts(texts: list, batch_size: int = BATCH_SIZE, concurrency: int = CONCURRENCY) -> list:
+    """
+    Embed many texts; returns one vector per text, in order.
+    Duplicates and cached texts are not sent, the rest goes out in batches of
+    `batch_size` with up to `concurrency` requests in flight. Raises on a
+    request that still fails after the retries.
+    """
+    keys = [_key(t) for t in texts]
+    vectors = {}
+    if CACHE_DIR:
+        for k in set(keys):
+            v = _cache_get(k)
+            if v is not None:
+                vectors[k] = v
+
+    todo = {}
+    for k, t in zip(keys, texts):
+        if k not in vectors:
+            todo.setdefault(k, t)
+    todo_keys = list(todo)
+    batches = [todo_keys[i:i + batch_size] for i in range(0, len(todo_keys), batch_size)]
+
+    def run(batch_keys):
+        for k, v in zip(batch_keys, _post_batch([todo[k] for k in batch_keys])):
+            vectors[k] = v
+            if CACHE_DIR:
+                _cache_put(k, v)
+
+    if len(batches) == 1:
+        run(batches[0])
+    elif batches:
+        with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+            list(pool.map(run, batches))   # re-raises the first failure
+
+    return [vectors[k] for k in keys]
+
 
 def get_embedding(text: str):
     if not JINA_API_KEY:
         raise ValueError("JINA_API_KEY not found in environment variables.")
-    #JINA API KEY is used for Authorization
-    headers = {
-        "Authorization": f"Bearer {JINA_API_KEY}",
-        "Content-Type": "application/json"
-    }
-    #Text is stored in data
-    data = {
-        "input": text,
-        "model": "jina-embeddings-v2-base-en"
-    }
-
     try:
-        #API is hit and the data is converted into embeddings
-        response = requests.post(JINA_EMBEDDING_ENDPOINT, headers=headers, json=data)
-        response.raise_for_status()
-        result = response.json()
-        return result.get("data")[0].get("embedding")
+        return embed_texts([text])[0]
     except Exception as e:
         print("Error fetching embedding from Jina:", str(e))
         return None
@@ -1,80 +1,263 @@
 import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
 import requests
 from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 load_dotenv()
 #used to save embeddings into qdrant and also for searching for top K matches.
-QDRANT_URL = os.getenv("QDRANT_URL")  
+# QDRANT_URL can point at Qdrant Cloud or a local instance / stand-in
+# (e.g. http://localhost:6333, where QDRANT_API_KEY may be left unset).
+QDRANT_URL = os.getenv("QDRANT_URL")
 QDRANT_API_KEY = os.getenv("QDRANT_API_KEY")
 QDRANT_COLLECTION_NAME = os.getenv("QDRANT_COLLECTION_NAME", "news_articles")
 
+BATCH_SIZE = int(os.getenv("QDRANT_BATCH_SIZE", "256"))    # points per upsert
+CONCURRENCY = int(os.getenv("QDRANT_CONCURRENCY", "4"))    # upserts in flight
+TIMEOUT = (5, float(os.getenv("QDRANT_TIMEOUT", "30")))    # (connect, read) seconds
+MAX_RETRIES = int(os.getenv("QDRANT_MAX_RETRIES", "5"))
+# QDRANT_PREFER_GRPC=1 sends vectors as protobuf over gRPC (port 6334) through
+# the official qdrant-client package (>= 1.10, query API) instead of JSON over REST
+PREFER_GRPC = os.getenv("QDRANT_PREFER_GRPC", "0") == "1"
+# collection metadata key stamped by upload_to_qdrant (needs Qdrant >= 1.16)
+VERSION_KEY = "content_version"
 
-#this function searches for top 5 matches related to a query
-def query_qdrant(embedding: list, top_k: int = 5, collection_name: str =QDRANT_COLLECTION_NAME ):
-    if not QDRANT_URL or not QDRANT_API_KEY:
+_session = None
+_grpc = None
+_lock = threading.Lock()
+
+
+def _check_config():
+    if not QDRANT_URL:
         raise ValueError("Missing Qdrant config in environment variables.")
 
-    headers = {
-        "Content-Type": "application/json",
-        "api-key": QDRANT_API_KEY
-    }
 
+def _get_session() -> requests.Session:
+    # pooled keep-alive connections; 429/5xx and connection errors are retried
+    # with exponential backoff. Upserts with explicit ids are idempotent.
+    global _session
+    with _lock:
+        if _session is None:
+            _check_config()
+            retry = Retry(
+                total=MAX_RETRIES,
+                backoff_factor=0.5,
+                status_forcelist=(429, 500, 502, 503, 504),
+                allowed_methods=frozenset({"GET", "POST", "PUT", "PATCH"}),
+                raise_on_status=False,
+            )
+            adapter = HTTPAdapter(max_retries=retry, pool_connections=1,
+                                  pool_maxsize=max(CONCURRENCY, 10))
+            session = requests.Session()
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.headers["Content-Type"] = "application/json"
+            if QDRANT_API_KEY:
+                session.headers["api-key"] = QDRANT_API_KEY
+            _session = session
+    return _session
+
+
+def _get_grpc():
+    global _grpc
+    with _lock:
+        if _grpc is None:
+            _check_config()
+            from qdrant_client import QdrantClient   # optional dependency
+            _grpc = QdrantClient(url=QDRANT_URL, api_key=QDRANT_API_KEY,
+                                 prefer_grpc=True, timeout=int(TIMEOUT[1]))
+    return _grpc
+
+
+def _unavailable(e: Exception) -> bool:
+    """
+    Qdrant down or unreachable (after retries) – callers degrade to "no hits".
+    Anything else (4xx, bad filter, missing collection, client API mismatch)
+    is a bug and is raised, so it can't pass as an empty result.
+    """
+    if isinstance(e, requests.HTTPError):
+        return e.response is not None and e.response.status_code >= 500
+    if isinstance(e, requests.RequestException):   # connection error, timeout
+        return True
+    if PREFER_GRPC:
+        import grpc
+        from qdrant_client.http.exceptions import ResponseHandlingException
+        if isinstance(e, ResponseHandlingException):   # transport failure
+            return True
+        if isinstance(e, grpc.RpcError):
+            return e.code() in (grpc.StatusCode.UNAVAILABLE, grpc.StatusCode.DEADLINE_EXCEEDED)
+    return False
+
+
+def _url(collection_name: str, path: str) -> str:
+    return f"{QDRANT_URL.rstrip('/')}/collections/{collection_name}{path}"
+
+
+def _hit(r) -> dict:
+    payload = r["payload"] or {}
+    return {"id": r["id"], "score": r["score"], "text": payload.get("text", ""), "payload": payload}
+
+
+def _point(doc: dict) -> dict:
     payload = {
-        "vector": embedding,
-        "top": top_k,
-        "with_payload": True
+        "text": doc["text"],
+        "title": doc.get("title", ""),
+        "link": doc.get("link", ""),
+        "published": doc.get("published", ""),
     }
+    payload.update(doc.get("payload", {}))
+    return {"id": doc["id"], "vector": doc["embedding"], "payload": payload}
+
+
+# ──────────────────────────────────────────────
+# Search
+# ──────────────────────────────────────────────
+#this function searches for top 5 matches related to a query
+def query_qdrant(embedding: list, top_k: int = 5, collection_name: str = QDRANT_COLLECTION_NAME,
+                 query_filter: dict = None):
+    results = search_batch([embedding], top_k, collection_name, query_filter)
+    return results[0] if results else []
 
-    url = f"{QDRANT_URL}/collections/{collection_name}/points/search"
 
+def search_batch(embeddings: list, top_k: int = 5, collection_name: str = QDRANT_COLLECTION_NAME,
+                 query_filter: dict = None) -> list:
+    """
+    Top-k hits for several query vectors in one round trip (/points/search/batch).
+    Returns one list of {"id", "score", "text", "payload"} per query; empty
+    lists if Qdrant is unreachable, other errors are raised.
+    """
+    _check_config()
     try:
-        response = requests.post(url, headers=headers, json=payload)
-        response.raise_for_status()
-        results = response.json()["result"]
+        if PREFER_GRPC:
+            from qdrant_client import models
+            filter_ = models.Filter.model_validate(query_filter) if query_filter else None
+            requests_ = [models.QueryRequest(query=e, limit=top_k, with_payload=True,
+                                             filter=filter_)
+                         for e in embeddings]
+            results = _get_grpc().query_batch_points(collection_name, requests_)
+            return [[_hit({"id": p.id, "score": p.score, "payload": p.payload}) for p in r.points]
+                    for r in results]
 
-        return [{"id": r["id"], "score": r["score"], "text": r["payload"].get("text", "")} for r in results]
+        searches = [{"vector": e, "limit": top_k, "with_payload": True} for e in embeddings]
+        if query_filter:
+            for s in searches:
+                s["filter"] = query_filter
+        response = _get_session().post(_url(collection_name, "/points/search/batch"),
+                                       json={"searches": searches}, timeout=TIMEOUT)
+        response.raise_for_status()
+        return [[_hit(r) for r in hits] for hits in response.json()["result"]]
 
     except Exception as e:
+        if not _unavailable(e):
+            raise
         print("Error querying Qdrant:", str(e))
-        return []
+        return [[] for _ in embeddings]
+
+
+# ──────────────────────────────────────────────
+# Upload
+# ──────────────────────────────────────────────
+def _upsert(collection_name: str, points: list, wait: bool) -> None:
+    if PREFER_GRPC:
+        from qdrant_client import models
+        _get_grpc().upsert(collection_name, wait=wait, points=[
+            models.PointStruct(id=p["id"], vector=p["vector"], payload=p["payload"])
+            for p in points
+        ])
+        return
+
+    response = _get_session().put(_url(collection_name, "/points"),
+                                  params={"wait": str(wait).lower()},
+                                  json={"points": points}, timeout=TIMEOUT)
+    if not response.ok:
+        print("Response content:", response.content.decode(errors="replace"))
+    response.raise_for_status()
+
+
 #function to upload embeddings to qdrant cloud
-def upload_to_qdrant(documents: list):
+def upload_to_qdrant(documents: list, collection_name: str = QDRANT_COLLECTION_NAME,
+                     batch_size: int = BATCH_SIZE, concurrency: int = CONCURRENCY,
+                     wait: bool = True):
     """
     Upload a list of documents to Qdrant collection.
-    Each document is a dict with keys: 'id', 'embedding' (list of floats), 'text'.
+    Each document is a dict with keys: 'id', 'embedding' (list of floats), 'text'
+    (optional 'title', 'link', 'published' and extra 'payload' fields).
+
+    Points go out in batches of `batch_size`, `concurrency` at a time. With
+    wait=True each call returns only once Qdrant has applied the batch, so the
+    points are searchable when this returns. Returns {"status", "points",
+    "batches", "seconds"}, or None if any batch failed after its retries.
     """
+    _check_config()
+    started = time.perf_counter()
+    points = [_point(doc) for doc in documents]
+    batches = [points[i:i + batch_size] for i in range(0, len(points), batch_size)]
 
-    if not QDRANT_URL or not QDRANT_API_KEY:
-        raise ValueError("Missing Qdrant config in environment variables.")
+    try:
+        if len(batches) <= 1:
+            for batch in batches:
+                _upsert(collection_name, batch, wait)
+        else:
+            with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+                list(pool.map(lambda b: _upsert(collection_name, b, wait), batches))
+        mark_updated(collection_name)
+    except Exception as e:
+        print("Error uploading to Qdrant:", str(e))
+        return None
 
-    headers = {
-        "Content-Type": "application/json",
-        "api-key": QDRANT_API_KEY
-    }
+    return {"status": "ok", "points": len(points), "batches": len(batches),
+            "seconds": round(time.perf_counter() - started, 3)}
 
-    points = []
-    for doc in documents:
-        points.append({
-            "id": doc["id"],
-            "vector": doc["embedding"],
-            "payload": {
-                "text": doc["text"],
-                "title": doc.get("title", ""),
-                "link": doc.get("link", ""),
-                "published": doc.get("published", "")
-            }
-        })
-
-    url = f"{QDRANT_URL}/collections/{QDRANT_COLLECTION_NAME}/points"
 
-    try:
-        response = requests.put(url, headers=headers, json={"points": points})
+def mark_updated(collection_name: str = QDRANT_COLLECTION_NAME) -> str:
+    """
+    Stamp a new content version into the collection's metadata. Call after any
+    write that changes what searches return (upload_to_qdrant does); caches
+    keyed on content_version() then drop their answers.
+    """
+    _check_config()
+    stamp = f"{time.time_ns()}-{uuid.uuid4().hex[:8]}"
+    if PREFER_GRPC:
+        _get_grpc().update_collection(collection_name, metadata={VERSION_KEY: stamp})
+    else:
+        response = _get_session().patch(f"{QDRANT_URL.rstrip('/')}/collections/{collection_name}",
+                                        json={"metadata": {VERSION_KEY: stamp}}, timeout=TIMEOUT)
         response.raise_for_status()
-        return response.json()
-    except requests.exceptions.HTTPError as e:
-        print("Error uploading to Qdrant:", e)
-        print("Response content:", response.content.decode())
+    return stamp
+
+
+def content_version(collection_name: str = QDRANT_COLLECTION_NAME):
+    """The collection's content version stamp; None if it has none or Qdrant can't be reached."""
+    _check_config()
+    try:
+        if PREFER_GRPC:
+            metadata = _get_grpc().get_collection(collection_name).config.metadata
+        else:
+            response = _get_session().get(f"{QDRANT_URL.rstrip('/')}/collections/{collection_name}",
+                                          timeout=TIMEOUT)
+            response.raise_for_status()
+            metadata = response.json()["result"]["config"].get("metadata")
+        return (metadata or {}).get(VERSION_KEY)
+    except Exception as e:
+        print("Error reading Qdrant collection version:", str(e))
         return None
+
+
+def count_points(collection_name: str = QDRANT_COLLECTION_NAME):
+    """Exact number of points in a collection, or None if Qdrant can't be reached."""
+    _check_config()
+    try:
+        if PREFER_GRPC:
+            return _get_grpc().count(collection_name, exact=True).count
+        response = _get_session().post(_url(collection_name, "/points/count"),
+                                       json={"exact": True}, timeout=TIMEOUT)
+        response.raise_for_status()
+        return response.json()["result"]["count"]
     except Exception as e:
-        print("Error uploading to Qdrant:", str(e))
+        print("Error counting Qdrant points:", str(e))
         return None
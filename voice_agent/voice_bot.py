@@ -6,8 +6,10 @@ Rev: 2025-07-03 – adds retry-on-participant-missing logic
 import asyncio
 import logging
 import os
+import re
 import sys
 import time
+from concurrent.futures import ThreadPoolExecutor
 
 # ──────────────────────────────────────────────
 # Optional: make sure the project-local venv’s site-packages are importable
@@ -25,11 +27,12 @@ from livekit.api.twirp_client import TwirpError  # for retry detection
 
 # ─── Local project imports ─────────────────────
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
-from models import AIMessage
-from app import app
-from database import db
+from database import db_app
+import chat_history
+import message_writer
 from livekit.plugins import deepgram
-from Chatbot.bot import generate_response
+from Chatbot import catalog
+from Chatbot.bot import astream_response, warm_projects
 
 # ──────────────────────────────────────────────
 # Environment
@@ -46,60 +49,191 @@ logger.debug("DEEPGRAM_API_KEY starts with: %s", deepgram_api_key[:6] if deepgra
 user_id    = os.getenv("USER_ID")
 session_id = os.getenv("SESSION_ID")
 
+# DB access only – the web app's routes, CORS and blueprints aren't needed here
+app = db_app("voice_bot")
+
+# DB work (history seed, message writes) runs here, never on the event loop
+DB_WORKERS = int(os.getenv("VOICE_DB_WORKERS", "4"))
+_db_executor = ThreadPoolExecutor(max_workers=DB_WORKERS, thread_name_prefix="voice-db")
+
+# Barge-in: caller speech cancels the reply in flight and flushes its audio.
+# Speculative: start answering a stable interim transcript before the final one.
+BARGE_IN              = os.getenv("VOICE_BARGE_IN", "1") == "1"
+BARGE_IN_MIN_CHARS    = int(os.getenv("VOICE_BARGE_IN_MIN_CHARS", "3"))
+SPECULATIVE           = os.getenv("VOICE_SPECULATIVE", "0") == "1"
+SPECULATIVE_MIN_WORDS = int(os.getenv("VOICE_SPECULATIVE_MIN_WORDS", "3"))
+
+# catalog project (Chatbot/projects.json) the calls are answered from
+VOICE_PROJECT = os.getenv("VOICE_PROJECT", "Krupal Habitat")
+
+# load the project's FAISS index before joining the room so the first answer
+# isn't delayed by it (Qdrant-backed projects have nothing to load)
+_voice_spec = catalog.project(VOICE_PROJECT)
+if _voice_spec.get("backend", "faiss") == "faiss" and os.getenv("PRELOAD_FAISS", "1") == "1":
+    warm_projects([_voice_spec["index"]])
+
 # ──────────────────────────────────────────────
-# Helper: call LangChain bot + persist chat
+# Helper: DB calls off the event loop
 # ──────────────────────────────────────────────
-def fetch_response(user_input: str, user_id: str, session_id: str) -> str:
-    logger.debug("[fetch_response] User: %s | Session: %s | Text: %s", user_id, session_id, user_input)
-    try:
+async def _run_db(fn, *args):
+    """Run a DB-touching call in the bounded executor, inside an app context."""
+    def call():
         with app.app_context():
-            # persist user message
-            db.session.add(AIMessage(user_id=user_id, session_id=session_id,
-                                    role="user", message=user_input))
-
-            # last 19 previous → history (this + 1 = 20)
-            history_rows = (
-                AIMessage.query.filter_by(user_id=user_id, session_id=session_id)
-                .order_by(AIMessage.timestamp.desc())
-                .limit(19)
-                .all()[::-1]
-            )
-            history = [{"role": r.role, "content": r.message} for r in history_rows]
-            history.append({"role": "user", "content": user_input})
-
-            result = generate_response("Krupal Habitat", history, True)
-
-            # persist AI answer
-            db.session.add(AIMessage(user_id=user_id, session_id=session_id,
-                                    role="ai", message=result["text"]))
-            db.session.commit()
-            logger.debug("[fetch_response] Bot reply: %s", result)
-            return result["text"]
-
-    except Exception:
-        logger.exception("❌ Exception inside fetch_response")
-        return "Sorry, I couldn't answer that."
+            return fn(*args)
+    return await asyncio.get_running_loop().run_in_executor(_db_executor, call)
 
 # ──────────────────────────────────────────────
-# LiveKit Agent entrypoint
+# Streaming: LLM tokens → speakable segments
 # ──────────────────────────────────────────────
-async def entrypoint(ctx: JobContext):
-    logger.info("🚀 Voice agent joined room: %s", ctx.room.name)
+FALLBACK_REPLY = "Sorry, I couldn't answer that."
+_SENTENCE_END = re.compile(r"[.!?](?=\s)")
+_CLAUSE_END   = re.compile(r"[,;:—–](?=\s)")
+MIN_CLAUSE_CHARS = 40   # cut at a comma only once there is enough to say
 
-    participant_ready = asyncio.Event()
 
-    # Deepgram STT / TTS
-    stt_impl = deepgram.STT(model="nova-3", api_key=deepgram_api_key)
+def split_segments(buf: str):
+    """
+    Cut complete sentences (and long-enough clauses) off the front of `buf`.
+    Returns (segments, rest). Punctuation must be followed by whitespace, so
+    "2.5 acres" or "₹20,000" are never split mid-number.
+    """
+    segments = []
+    while True:
+        m = _SENTENCE_END.search(buf)
+        if m is None:
+            m = _CLAUSE_END.search(buf, MIN_CLAUSE_CHARS)
+        if m is None:
+            return segments, buf
+        seg, buf = buf[:m.end()].strip(), buf[m.end():]
+        if seg:
+            segments.append(seg)
+
+
+def _same_words(a: str, b: str) -> bool:
+    """Transcript equality ignoring case and punctuation."""
+    norm = lambda t: re.sub(r"[^\w\s]", "", t.lower()).split()
+    return norm(a) == norm(b)
+
+
+async def stream_reply(user_input: str, user_id: str, session_id: str,
+                       heard_at: float = None, go: asyncio.Event = None,
+                       answered: asyncio.Event = None):
+    """
+    Async generator of speakable segments of the bot's answer, yielded as soon
+    as each sentence/clause is complete. The full answer is persisted at the end,
+    once `go` is set (speculative replies), then `answered` is set; a reply
+    cancelled before that leaves no trace.
+    Nothing here blocks the event loop: DB calls go to the executor, the
+    embedding / search / LLM calls are awaited.
+    """
+    logger.debug("[stream_reply] User: %s | Session: %s | Text: %s", user_id, session_id, user_input)
+    heard_at = heard_at or time.perf_counter()
+    parts, buf = [], ""
+    try:
+        history = await _run_db(chat_history.history_for, user_id, session_id, user_input)
+        logger.info("⏱️ history %.0f ms", (time.perf_counter() - heard_at) * 1000)
+
+        async for token in astream_response(VOICE_PROJECT, history, True):
+            if not parts:
+                logger.info("⏱️ first token %.0f ms", (time.perf_counter() - heard_at) * 1000)
+            parts.append(token)
+            segments, buf = split_segments(buf + token)
+            for seg in segments:
+                yield seg
+        if buf.strip():
+            yield buf.strip()
+
+        answer = "".join(parts).strip()
+        logger.info("⏱️ answer complete %.0f ms", (time.perf_counter() - heard_at) * 1000)
+        if go is not None:
+            await go.wait()
+        await _run_db(message_writer.save_turn, user_id, session_id, user_input, answer)
+        if answered is not None:
+            answered.set()
+        logger.debug("[stream_reply] Bot reply: %s", answer)
+
+    except Exception:
+        logger.exception("❌ Exception inside stream_reply")
+        if not parts:
+            yield FALLBACK_REPLY
+
+# ──────────────────────────────────────────────
+# Voice session: STT → bot → TTS for one caller
+# ──────────────────────────────────────────────
+def make_speech(http_session=None):
+    """Deepgram STT / TTS. Outside a LiveKit job an aiohttp session must be passed."""
+    stt_impl = deepgram.STT(model="nova-3", api_key=deepgram_api_key,
+                            http_session=http_session)
     tts_impl = deepgram.TTS(
         model="aura-2-andromeda-en",
         encoding="linear16",
         sample_rate=24000,
         api_key=deepgram_api_key,
+        http_session=http_session,
     )
+    return stt_impl, tts_impl
+
+
+async def run_session(room: rtc.Room, connect, user_id: str, session_id: str,
+                      stt_impl, tts_impl, participant_identity: str = None,
+                      join_timeout: float = None):
+    """
+    Talk to the caller in `room` until they leave or the room closes.
+    `connect` is an async callable that joins the room; it runs after the
+    event hooks are registered so no track_subscribed event is missed.
+    """
+    participant_ready = asyncio.Event()
+    finished = asyncio.Event()
+    tasks = set()
+    playback_lock = asyncio.Lock()   # one voice at a time on the shared track
 
     audio_src   = rtc.AudioSource(sample_rate=24000, num_channels=1)
     audio_track = rtc.LocalAudioTrack.create_audio_track("bot-tts", audio_src)
 
+    async def speak(segments, heard_at: float, go: asyncio.Event = None):
+        """
+        Synthesize each segment as soon as it arrives and play them in order.
+        Synthesis of the next segment overlaps playback of the current one.
+        Only playback holds playback_lock; other callers' LLM work keeps going.
+        Playback waits for `go` (speculative replies); cancelling stops
+        generation, synthesis and playback together.
+        """
+        synth_queue = asyncio.Queue(maxsize=3)
+
+        async def synthesize():
+            try:
+                async for seg in segments:
+                    logger.info("🤖 Bot: %s", seg)
+                    await synth_queue.put(tts_impl.synthesize(seg))
+            except Exception:
+                logger.exception("❌ TTS producer failed")
+            finally:
+                await segments.aclose()   # stops the LLM stream when cancelled
+            await synth_queue.put(None)
+
+        producer = asyncio.create_task(synthesize())
+        synth_stream, first_frame = None, True
+        try:
+            if go is not None:
+                await go.wait()
+            async with playback_lock:
+                while (synth_stream := await synth_queue.get()) is not None:
+                    async for chunk in synth_stream:
+                        if first_frame:
+                            first_frame = False
+                            logger.info("⏱️ first audio %.0f ms",
+                                        (time.perf_counter() - heard_at) * 1000)
+                        await audio_src.capture_frame(chunk.frame)
+        finally:
+            producer.cancel()
+            # TTS requests already started for this reply are not needed any more
+            unplayed = [synth_stream] if synth_stream is not None else []
+            while not synth_queue.empty():
+                unplayed.append(synth_queue.get_nowait())
+            for stream in unplayed:
+                if stream is not None:
+                    await stream.aclose()
+
     async def transcribe_track(participant: rtc.RemoteParticipant, track: rtc.Track):
         logger.info("🎙️ Transcribing %s", participant.identity)
         audio_stream = rtc.AudioStream(track)
@@ -109,36 +243,142 @@ async def entrypoint(ctx: JobContext):
             async for ev in audio_stream:
                 stt_stream.push_frame(ev.frame)
 
+        # At most one reply per caller runs as a task beside the STT loop, so
+        # transcripts (and audio) keep flowing while it thinks and speaks.
+        # A reply is "speculative" until its go event is set by the final transcript.
+        reply = None            # {"task", "text", "go", "answered"}
+        unanswered = ""         # caller text whose reply was cut off before it was saved
+        last_interim = ""
+
+        def start_reply(text: str, speculative: bool = False, after: asyncio.Task = None):
+            nonlocal reply
+            heard_at, go, answered = time.perf_counter(), asyncio.Event(), asyncio.Event()
+            if not speculative:
+                go.set()
+
+            async def run():
+                if after is not None:
+                    await asyncio.wait([after])   # VOICE_BARGE_IN=0: finish the previous answer
+                await speak(stream_reply(text, user_id, session_id, heard_at, go, answered),
+                            heard_at, go)
+
+            task = asyncio.create_task(run())
+            reply = {"task": task, "text": text, "go": go, "answered": answered}
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+
+        def stop_reply(reason: str):
+            nonlocal reply, unanswered
+            if reply is None:
+                return
+            if not reply["task"].done():
+                reply["task"].cancel()
+                if reply["go"].is_set():
+                    audio_src.clear_queue()   # drop audio already handed to LiveKit
+                    logger.info("✋ Barge-in (%s) – stopped reply to: %s", reason, reply["text"])
+                    if not reply["answered"].is_set():
+                        unanswered = reply["text"]
+            reply = None
+
+        def speaking() -> bool:
+            return reply is not None and reply["go"].is_set() and not reply["task"].done()
+
         async def handle_transcripts():
+            nonlocal unanswered, last_interim
             async for ev in stt_stream:
-                if ev.type == stt.SpeechEventType.FINAL_TRANSCRIPT:
-                    user_text = ev.alternatives[0].text
-                    logger.info("🙋 %s said: %s", participant.identity, user_text)
+                if ev.type == stt.SpeechEventType.START_OF_SPEECH:
+                    if BARGE_IN and speaking():
+                        stop_reply("voice activity")
 
-                    bot_text = fetch_response(user_text, user_id, session_id)
-                    logger.info("🤖 Bot: %s", bot_text)
+                elif ev.type == stt.SpeechEventType.INTERIM_TRANSCRIPT:
+                    partial = ev.alternatives[0].text.strip()
+                    if len(partial) < BARGE_IN_MIN_CHARS:
+                        continue
+                    if BARGE_IN and speaking():
+                        stop_reply("interim transcript")
+                    text = f"{unanswered} {partial}".strip()
+                    if (reply is not None and not reply["go"].is_set()
+                            and not _same_words(reply["text"], text)):
+                        stop_reply("caller kept talking")   # speculation went stale
+                    if (SPECULATIVE and reply is None and _same_words(partial, last_interim)
+                            and len(partial.split()) >= SPECULATIVE_MIN_WORDS):
+                        logger.debug("🔮 Speculating on: %s", text)
+                        start_reply(text, speculative=True)
+                    last_interim = partial
 
-                    synth_stream = tts_impl.synthesize(bot_text)
-                    async for chunk in synth_stream:
-                        await audio_src.capture_frame(chunk.frame)
+                elif ev.type == stt.SpeechEventType.FINAL_TRANSCRIPT:
+                    user_text = ev.alternatives[0].text.strip()
+                    last_interim = ""
+                    if not user_text:
+                        continue
+                    logger.info("🙋 %s said: %s", participant.identity, user_text)
+                    if (reply is not None and not reply["go"].is_set()
+                            and _same_words(reply["text"], f"{unanswered} {user_text}")):
+                        logger.debug("🔮 Speculation hit")
+                        reply["go"].set()
+                        unanswered = ""
+                        continue
+                    after = reply["task"] if not BARGE_IN and speaking() else None
+                    if after is None:
+                        stop_reply("new turn")   # may hand its text over to `unanswered`
+                    text = f"{unanswered} {user_text}".strip()
+                    unanswered = ""
+                    start_reply(text, after=after)
 
         await asyncio.gather(pump_audio(), handle_transcripts())
 
+    def _is_caller(participant) -> bool:
+        return participant_identity is None or participant.identity == participant_identity
+
     # LiveKit event hooks
-    @ctx.room.on("track_subscribed")
+    @room.on("track_subscribed")
     def _(track, publication, participant):
-        if track.kind == rtc.TrackKind.KIND_AUDIO:
+        if track.kind == rtc.TrackKind.KIND_AUDIO and _is_caller(participant):
             participant_ready.set()
-            asyncio.create_task(transcribe_track(participant, track))
+            task = asyncio.create_task(transcribe_track(participant, track))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+
+    @room.on("participant_disconnected")
+    def _left(participant):
+        if _is_caller(participant):
+            finished.set()
+
+    @room.on("disconnected")
+    def _closed(*_):
+        finished.set()
 
     # connect & wait
-    await ctx.connect(auto_subscribe=AutoSubscribe.AUDIO_ONLY)
+    await connect()
     logger.info("🔌 Connected, awaiting audio...")
-    await participant_ready.wait()
+    try:
+        await asyncio.wait_for(participant_ready.wait(), join_timeout)
+    except asyncio.TimeoutError:
+        logger.warning("Caller never published audio in %s – giving up", room.name)
+        return
 
-    await ctx.room.local_participant.publish_track(audio_track)
+    await room.local_participant.publish_track(audio_track)
     logger.info("📢 TTS track published – ready to chat.")
 
+    await finished.wait()
+    for task in list(tasks):
+        task.cancel()
+    logger.info("👋 Session ended in room %s", room.name)
+
+
+# ──────────────────────────────────────────────
+# LiveKit Agent entrypoint (one subprocess per call, see tasks/voice_tasks.py)
+# ──────────────────────────────────────────────
+async def entrypoint(ctx: JobContext):
+    logger.info("🚀 Voice agent joined room: %s", ctx.room.name)
+
+    stt_impl, tts_impl = make_speech()
+    await run_session(
+        ctx.room,
+        lambda: ctx.connect(auto_subscribe=AutoSubscribe.AUDIO_ONLY),
+        user_id, session_id, stt_impl, tts_impl,
+    )
+
 # ──────────────────────────────────────────────
 # Robust startup wrapper
 # ──────────────────────────────────────────────
@@ -0,0 +1,99 @@
+"""
+voice_agent/worker_pool.py
+Long-lived voice worker: one process serves many calls.
+
+The per-call mode (tasks/voice_tasks.run_voice_agent) spawns voice_bot.py for
+every call – re-importing Flask, LangChain and LiveKit and loading FAISS
+before it can say hello, while holding a Celery slot for the whole call. This
+worker does all of that once at startup, then pops room dispatches
+(user_id, session_id, room, identity) from a Redis list and joins each room
+directly, running up to VOICE_MAX_ROOMS calls concurrently.
+
+    python -m voice_agent.worker_pool
+
+Dispatches are pushed by tasks.voice_tasks.dispatch_voice_agent (used by
+/ai/start_voice_agent when VOICE_WORKER_POOL=1). Run as many of these
+processes per host as there are cores to spare.
+"""
+
+import asyncio
+import json
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import aiohttp
+import redis.asyncio as aioredis
+from livekit import rtc
+from livekit.api import AccessToken, VideoGrants
+
+from tasks.voice_tasks import VOICE_QUEUE, VOICE_QUEUE_REDIS_URL
+from voice_agent.voice_bot import logger, make_speech, run_session, warm_projects
+
+MAX_ROOMS = int(os.getenv("VOICE_MAX_ROOMS", "8"))
+JOIN_TIMEOUT = float(os.getenv("VOICE_JOIN_TIMEOUT", "60"))
+BOT_IDENTITY = os.getenv("VOICE_BOT_IDENTITY", "salesbot")
+
+_sessions = set()   # strong refs to running session tasks
+
+
+# ──────────────────────────────────────────────
+def _bot_token(room: str) -> str:
+    return AccessToken(
+        api_key=os.environ["LIVEKIT_API_KEY"],
+        api_secret=os.environ["LIVEKIT_API_SECRET"],
+    ).with_identity(f"{BOT_IDENTITY}-{room}").with_grants(
+        VideoGrants(room_join=True, room=room, can_publish=True, can_subscribe=True)
+    ).to_jwt()
+
+
+async def _serve(job: dict, stt_impl, tts_impl, slots: asyncio.Semaphore):
+    room = rtc.Room()
+    try:
+        logger.info("🚀 Dispatch for room %s (user %s)", job["room"], job["user_id"])
+        await run_session(
+            room,
+            lambda: room.connect(os.environ["LIVEKIT_URL"], _bot_token(job["room"]),
+                                 rtc.RoomOptions(auto_subscribe=True)),
+            job["user_id"], job["session_id"], stt_impl, tts_impl,
+            participant_identity=job.get("identity"),
+            join_timeout=JOIN_TIMEOUT,
+        )
+    except Exception:
+        logger.exception("❌ Voice session failed in room %s", job.get("room"))
+    finally:
+        slots.release()   # first: a failing disconnect must not cost the pool a slot
+        try:
+            await room.disconnect()
+        except Exception:
+            logger.exception("⚠️ Disconnect failed in room %s", job.get("room"))
+
+
+async def main():
+    warm_projects()   # every catalog index, once for all calls
+
+    queue = aioredis.from_url(VOICE_QUEUE_REDIS_URL)
+    slots = asyncio.Semaphore(MAX_ROOMS)
+    async with aiohttp.ClientSession() as http_session:
+        stt_impl, tts_impl = make_speech(http_session)
+        logger.info("🟢 Voice worker ready – up to %d rooms, queue %s", MAX_ROOMS, VOICE_QUEUE)
+
+        while True:
+            await slots.acquire()   # only take work we have room for
+            _, raw = await queue.blpop(VOICE_QUEUE)
+            try:
+                job = json.loads(raw)
+                if not all(job.get(k) for k in ("room", "user_id", "session_id")):
+                    raise ValueError("room, user_id and session_id required")
+            except (ValueError, TypeError, AttributeError) as e:
+                logger.error("❌ Dropping malformed dispatch %r: %s", raw[:200], e)
+                slots.release()
+                continue
+            task = asyncio.create_task(_serve(job, stt_impl, tts_impl, slots))
+            _sessions.add(task)
+            task.add_done_callback(_sessions.discard)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())